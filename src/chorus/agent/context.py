@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import functools
 import json
 import logging
 import uuid
@@ -87,37 +88,123 @@ def _get_context_limit(model: str | None) -> int:
     return min(_DEFAULT_CONTEXT_LIMIT, MAX_INPUT_TOKENS)
 
 
+@functools.cache
+def _get_encoder() -> Any:
+    """Return a shared tiktoken encoder, or None if tiktoken is unavailable.
+
+    tiktoken is an optional extra (``pip install chorus[tokenizer]``).  The
+    encoder is built once; loading its BPE table is the expensive part.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        logger.warning("tiktoken encoder unavailable, using chars/4 estimate", exc_info=True)
+        return None
+
+
+def warm_token_encoder() -> None:
+    """Build the shared encoder ahead of first use.
+
+    The first ``tiktoken.get_encoding`` call may download its BPE file, so
+    call this from a worker thread at startup rather than on the event loop.
+    """
+    _get_encoder()
+
+
 def estimate_tokens(text: str) -> int:
-    """Rough token estimate: chars / 4."""
+    """Token estimate: tiktoken's count when installed, otherwise chars / 4."""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
     return len(text) // 4
 
 
-def estimate_message_tokens(msg: dict[str, Any]) -> int:
-    """Estimate tokens for a single message dict.
+def _json_size(obj: Any) -> int:
+    """Length of ``json.dumps(obj)`` without building the string.
 
-    Handles standard messages, messages with tool_calls lists,
-    and messages with _anthropic_content raw blocks.
+    Exact for ASCII text without characters that need escaping; escapes
+    are not counted, which is fine for a chars/4 estimate.
+    """
+    if isinstance(obj, str):
+        return len(obj) + 2
+    if obj is None or isinstance(obj, (bool, int, float)):
+        # repr() of None/True/False has the same length as null/true/false
+        return len(repr(obj))
+    if isinstance(obj, dict):
+        if not obj:
+            return 2
+        # '{' + '}' + ', ' between items + '"key": value' per item
+        return 2 * len(obj) + sum(len(str(k)) + 4 + _json_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        if not obj:
+            return 2
+        return 2 * len(obj) + sum(_json_size(v) for v in obj)
+    return len(str(obj)) + 2
+
+
+def _char_message_tokens(msg: dict[str, Any]) -> int:
+    """Estimate tokens for a single message dict at chars / 4.
+
+    JSON parts are sized without serializing them, so this stays cheap
+    enough to run over a whole history.
     """
     tokens = 4  # overhead for role and structure
 
     content = msg.get("content") or ""
-    tokens += estimate_tokens(content)
+    tokens += len(content) // 4
 
     # Tool calls: estimate the arguments JSON
     tool_calls = msg.get("tool_calls")
     if tool_calls:
+        chars = 0
         for tc in tool_calls:
-            tokens += estimate_tokens(tc.get("name", ""))
+            chars += len(tc.get("name", ""))
             args = tc.get("arguments")
             if isinstance(args, dict):
-                tokens += estimate_tokens(json.dumps(args))
+                chars += _json_size(args)
             elif isinstance(args, str):
-                tokens += estimate_tokens(args)
+                chars += len(args)
+        tokens += chars // 4
 
     # Anthropic raw content blocks
     raw_content = msg.get("_anthropic_content")
-    if raw_content and isinstance(raw_content, list):
-        tokens += estimate_tokens(json.dumps(raw_content))
+    if isinstance(raw_content, list) and raw_content:
+        tokens += _json_size(raw_content) // 4
+
+    return tokens
+
+
+def estimate_message_tokens(msg: dict[str, Any]) -> int:
+    """Estimate tokens for a single message dict.
+
+    Handles standard messages, messages with tool_calls lists,
+    and messages with _anthropic_content raw blocks.  Every part is counted
+    in the same unit: tiktoken tokens when the encoder is available,
+    otherwise chars / 4 (where JSON is sized without serializing it).
+    """
+    if _get_encoder() is None:
+        return _char_message_tokens(msg)
+
+    tokens = 4  # overhead for role and structure
+    tokens += estimate_tokens(msg.get("content") or "")
+
+    raw_content = msg.get("_anthropic_content")
+    if not isinstance(raw_content, list):
+        raw_content = None
+
+    for tc in msg.get("tool_calls") or ():
+        tokens += estimate_tokens(tc.get("name", ""))
+        args = tc.get("arguments")
+        if isinstance(args, dict):
+            tokens += estimate_tokens(json.dumps(args, ensure_ascii=False, default=str))
+        elif isinstance(args, str):
+            tokens += estimate_tokens(args)
+    if raw_content:
+        tokens += estimate_tokens(json.dumps(raw_content, ensure_ascii=False, default=str))
 
     return tokens
 
@@ -128,6 +215,10 @@ def _truncate_to_budget(
     """Truncate the oldest messages to fit within a token budget.
 
     Preserves system messages at the start and keeps the most recent messages.
+    Sized at chars / 4 even with tiktoken installed: this walks the history
+    on every :func:`build_llm_context` call with nothing to cache counts in,
+    so it would BPE-encode up to a whole budget of text on the event loop
+    each turn.  The tool loop caches per message and counts exactly.
     """
     if not messages:
         return messages
@@ -142,7 +233,7 @@ def _truncate_to_budget(
             conv_msgs.append(msg)
 
     # Calculate system message overhead
-    system_tokens = sum(estimate_message_tokens(m) for m in system_msgs)
+    system_tokens = sum(_char_message_tokens(m) for m in system_msgs)
     remaining_budget = budget_tokens - system_tokens
 
     if remaining_budget <= 0:
@@ -153,7 +244,7 @@ def _truncate_to_budget(
     kept: list[dict[str, Any]] = []
     total = 0
     for msg in reversed(conv_msgs):
-        msg_tokens = estimate_message_tokens(msg)
+        msg_tokens = _char_message_tokens(msg)
         if total + msg_tokens > remaining_budget:
             break
         kept.append(msg)
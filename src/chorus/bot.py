@@ -16,7 +16,7 @@ from discord.ext import commands
 from dotenv import load_dotenv
 
 import chorus.commands
-from chorus.agent.context import ContextManager, build_llm_context
+from chorus.agent.context import ContextManager, build_llm_context, warm_token_encoder
 from chorus.agent.directory import AgentDirectory
 from chorus.agent.manager import AgentManager
 from chorus.agent.threads import ExecutionThread, ThreadManager, ThreadRunner, ThreadStatus
@@ -78,6 +78,9 @@ class ChorusBot(commands.Bot):
 
     async def setup_hook(self) -> None:
         """Initialize storage, agent manager, load cogs, and register error handler."""
+        # Load the tokenizer off the event loop (first use may download it)
+        await asyncio.to_thread(warm_token_encoder)
+
         # Initialize database
         self.db = Database(self.config.chorus_home / "db" / "chorus.db")
         await self.db.init()
@@ -19,7 +19,7 @@ if TYPE_CHECKING:
 # ---------------------------------------------------------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCall:
     """A single tool call requested by the LLM."""
 
@@ -28,7 +28,7 @@ class ToolCall:
     arguments: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class Usage:
     """Token usage for a single LLM call."""
 
@@ -52,7 +52,7 @@ class Usage:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMResponse:
     """Normalized response from any LLM provider."""
 
@@ -8,7 +8,8 @@ text response or the iteration cap is reached.
 from __future__ import annotations
 
 import asyncio
-import inspect
+import bisect
+import itertools
 import json
 import logging
 from dataclasses import dataclass, field
@@ -32,16 +33,19 @@ if TYPE_CHECKING:
     from chorus.permissions.engine import PermissionProfile
     from chorus.tools.registry import ToolDefinition, ToolRegistry
 
-# Parameters that are injected by _execute_tool, not provided by the LLM.
-_CONTEXT_INJECTED_PARAMS = frozenset({
-    "workspace", "profile", "agent_name", "chorus_home",
-    "is_admin", "db", "host_execution", "scope_path",
-    "process_manager", "branch_id", "on_tool_progress",
-    "hook_dispatcher", "bot",
-})
-
 logger = logging.getLogger("chorus.llm.tool_loop")
 
+# Circuit breaker: consecutive failed tool calls or max_tokens truncations
+# before the loop gives up.  Any successful tool call resets the count.
+_MAX_CONSECUTIVE_ERRORS = 5
+
+# Tool results longer than this are cut down before entering the history:
+# the head and tail are kept and the middle replaced with a marker, so one
+# oversized output cannot dominate the context or be re-measured every turn.
+_MAX_TOOL_RESULT_CHARS = 64_000
+_TOOL_RESULT_HEAD_CHARS = 32_000
+_TOOL_RESULT_TAIL_CHARS = 16_000
+
 # ---------------------------------------------------------------------------
 # Permission category mapping
 # ---------------------------------------------------------------------------
@@ -139,70 +143,88 @@ def _build_action_string(tool_name: str, arguments: dict[str, Any]) -> str:
 # ---------------------------------------------------------------------------
 
 
+def _cached_message_tokens(
+    msg: dict[str, Any], token_cache: dict[int, tuple[dict[str, Any], int]] | None
+) -> int:
+    """Estimate tokens for ``msg``, reusing an earlier estimate from ``token_cache``.
+
+    The cache is keyed by ``id(msg)`` and holds the message itself so the
+    id cannot be recycled while the entry lives.  Tool-loop messages are
+    never mutated after being appended, so entries never go stale.
+    """
+    if token_cache is None:
+        return estimate_message_tokens(msg)
+    entry = token_cache.get(id(msg))
+    if entry is not None and entry[0] is msg:
+        return entry[1]
+    tokens = estimate_message_tokens(msg)
+    token_cache[id(msg)] = (msg, tokens)
+    return tokens
+
+
 def _truncate_tool_loop_messages(
-    messages: list[dict[str, Any]], budget: int
+    messages: list[dict[str, Any]],
+    budget: int,
+    token_cache: dict[int, tuple[dict[str, Any], int]] | None = None,
 ) -> list[dict[str, Any]]:
     """Truncate tool-loop messages to fit within a token budget.
 
     Groups assistant+tool_result messages into atomic blocks so that a
     tool_call is never separated from its results (which would cause an
     API error).  Keeps the most recent blocks within budget.
+
+    Pass the same ``token_cache`` across calls to avoid re-estimating
+    messages that were already measured on an earlier iteration.  When
+    nothing is dropped and system messages already lead, ``messages``
+    itself is returned rather than a copy.
     """
     if not messages:
         return messages
 
-    # 1. Separate system messages from conversation messages
+    # 1. Single pass: separate system messages, measure every message, and
+    #    group conversation messages into atomic (start index, tokens) blocks.
+    #    An assistant msg with tool_calls + all following role:"tool" msgs = one block
     system_msgs: list[dict[str, Any]] = []
     conv_msgs: list[dict[str, Any]] = []
+    blocks: list[tuple[int, int]] = []
+    system_tokens = 0
+    system_leads = True
+    in_tool_block = False
     for msg in messages:
-        if msg.get("role") == "system":
+        tokens = _cached_message_tokens(msg, token_cache)
+        role = msg.get("role")
+        if role == "system":
             system_msgs.append(msg)
+            system_tokens += tokens
+            system_leads = system_leads and not conv_msgs
+            continue
+        if in_tool_block and role == "tool":
+            start, block_tokens = blocks[-1]
+            blocks[-1] = (start, block_tokens + tokens)
         else:
-            conv_msgs.append(msg)
-
-    # 2. Group into atomic blocks
-    #    An assistant msg with tool_calls + all following role:"tool" msgs = one block
-    blocks: list[list[dict[str, Any]]] = []
-    i = 0
-    while i < len(conv_msgs):
-        msg = conv_msgs[i]
-        if msg.get("role") == "assistant" and msg.get("tool_calls"):
-            # Start an atomic block: assistant + following tool results
-            block = [msg]
-            i += 1
-            while i < len(conv_msgs) and conv_msgs[i].get("role") == "tool":
-                block.append(conv_msgs[i])
-                i += 1
-            blocks.append(block)
-        else:
-            blocks.append([msg])
-            i += 1
+            blocks.append((len(conv_msgs), tokens))
+            in_tool_block = role == "assistant" and bool(msg.get("tool_calls"))
+        conv_msgs.append(msg)
 
-    # 3. Calculate system token overhead
-    system_tokens = sum(estimate_message_tokens(m) for m in system_msgs)
+    # 2. Return early when everything fits, which is the common case
     remaining_budget = budget - system_tokens
+    prefix = [0, *itertools.accumulate(tokens for _, tokens in blocks)]
+    if prefix[-1] <= remaining_budget:
+        return messages if system_leads else system_msgs + conv_msgs
 
     if remaining_budget <= 0:
         # System messages alone exceed budget — return system + last block
-        return system_msgs + (blocks[-1] if blocks else [])
-
-    # 4. Walk backwards through blocks, accumulating tokens until budget hit
-    kept: list[list[dict[str, Any]]] = []
-    total = 0
-    for block in reversed(blocks):
-        block_tokens = sum(estimate_message_tokens(m) for m in block)
-        if total + block_tokens > remaining_budget:
-            break
-        kept.append(block)
-        total += block_tokens
+        return system_msgs + (conv_msgs[blocks[-1][0]:] if blocks else [])
 
-    kept.reverse()
+    # 3. Keep the longest suffix of blocks that fits.  prefix[k] is the token
+    #    total of blocks[:k], so the first kept block is the smallest k with
+    #    prefix[-1] - prefix[k] <= remaining_budget.
+    cut = bisect.bisect_left(prefix, prefix[-1] - remaining_budget)
 
-    # 5. Reassemble
-    result = list(system_msgs)
-    for block in kept:
-        result.extend(block)
-    return result
+    # 4. Reassemble
+    if cut == len(blocks):
+        return system_msgs
+    return system_msgs + conv_msgs[blocks[cut][0]:]
 
 
 # ---------------------------------------------------------------------------
@@ -269,7 +291,11 @@ async def _fire_event(
     on_event: Callable[[ToolLoopEvent], Awaitable[None]] | None,
     event: ToolLoopEvent,
 ) -> None:
-    """Fire an event callback, swallowing any errors."""
+    """Fire an event callback, swallowing any errors.
+
+    Call sites check ``on_event is not None`` first so that no event
+    object is built when nobody is listening.
+    """
     if on_event is None:
         return
     try:
@@ -285,6 +311,10 @@ async def _fire_event(
 
 def _is_error_result(content: str) -> bool:
     """Check if a tool result string represents an error (JSON with "error" key)."""
+    # Only a JSON object can carry an "error" key; skip parsing (possibly
+    # very large) plain-text results outright.
+    if not isinstance(content, str) or not content.lstrip().startswith("{"):
+        return False
     try:
         data = json.loads(content)
         return isinstance(data, dict) and "error" in data
@@ -292,6 +322,18 @@ def _is_error_result(content: str) -> bool:
         return False
 
 
+def _cap_tool_result(content: str) -> str:
+    """Shorten *content* to its head and tail if it exceeds the result cap."""
+    if len(content) <= _MAX_TOOL_RESULT_CHARS:
+        return content
+    omitted = len(content) - _TOOL_RESULT_HEAD_CHARS - _TOOL_RESULT_TAIL_CHARS
+    return (
+        content[:_TOOL_RESULT_HEAD_CHARS]
+        + f"\n\n[... truncated {omitted} of {len(content)} chars ...]\n\n"
+        + content[-_TOOL_RESULT_TAIL_CHARS:]
+    )
+
+
 def _validate_tool_arguments(
     tool: ToolDefinition,
     arguments: dict[str, Any],
@@ -303,17 +345,15 @@ def _validate_tool_arguments(
     Context-injected parameters (workspace, profile, etc.) are excluded
     from the check since the LLM is not expected to provide them.
     """
-    schema = tool.parameters
-    required = schema.get("required", [])
-    properties = schema.get("properties", {})
-
-    # Filter out context-injected params — the LLM shouldn't provide these
-    required_from_llm = [r for r in required if r not in _CONTEXT_INJECTED_PARAMS]
+    # Context-injected params are already filtered out (and cached per tool)
+    required_from_llm = tool.llm_required
 
     missing = [r for r in required_from_llm if r not in arguments]
     if not missing:
         return None
 
+    properties = tool.parameters.get("properties", {})
+
     # Build a helpful error listing all expected parameters
     lines = [f"Missing required argument(s): {', '.join(repr(m) for m in missing)}."]
     lines.append(f"Tool '{tool.name}' expects:")
@@ -335,11 +375,12 @@ async def _execute_tool(
 ) -> str:
     """Execute a tool handler, injecting context parameters as needed.
 
-    Uses ``inspect.signature()`` to determine which context parameters
-    (workspace, profile, agent_name) the handler accepts and injects
-    them automatically. The LLM only provides schema-defined arguments.
+    Uses the handler's signature (cached on the tool definition) to
+    determine which context parameters (workspace, profile, agent_name)
+    the handler accepts and injects them automatically. The LLM only
+    provides schema-defined arguments.
     """
-    sig = inspect.signature(tool.handler)
+    params = tool.handler_params
     kwargs = dict(arguments)
 
     # Inject context parameters if the handler accepts them AND the LLM
@@ -347,31 +388,31 @@ async def _execute_tool(
     # collisions like edit_permissions' ``profile`` (a preset name string
     # from the LLM) being overwritten by ``ctx.profile`` (a
     # PermissionProfile object).
-    if "workspace" in sig.parameters and "workspace" not in arguments:
+    if "workspace" in params and "workspace" not in arguments:
         kwargs["workspace"] = ctx.workspace
-    if "profile" in sig.parameters and "profile" not in arguments:
+    if "profile" in params and "profile" not in arguments:
         kwargs["profile"] = ctx.profile
-    if "agent_name" in sig.parameters and "agent_name" not in arguments:
+    if "agent_name" in params and "agent_name" not in arguments:
         kwargs["agent_name"] = ctx.agent_name
-    if "chorus_home" in sig.parameters and "chorus_home" not in arguments:
+    if "chorus_home" in params and "chorus_home" not in arguments:
         kwargs["chorus_home"] = ctx.chorus_home
-    if "is_admin" in sig.parameters and "is_admin" not in arguments:
+    if "is_admin" in params and "is_admin" not in arguments:
         kwargs["is_admin"] = ctx.is_admin
-    if "db" in sig.parameters and "db" not in arguments:
+    if "db" in params and "db" not in arguments:
         kwargs["db"] = ctx.db
-    if "host_execution" in sig.parameters and "host_execution" not in arguments:
+    if "host_execution" in params and "host_execution" not in arguments:
         kwargs["host_execution"] = ctx.host_execution
-    if "scope_path" in sig.parameters and "scope_path" not in arguments:
+    if "scope_path" in params and "scope_path" not in arguments:
         kwargs["scope_path"] = ctx.scope_path
-    if "process_manager" in sig.parameters and "process_manager" not in arguments:
+    if "process_manager" in params and "process_manager" not in arguments:
         kwargs["process_manager"] = ctx.process_manager
-    if "hook_dispatcher" in sig.parameters and "hook_dispatcher" not in arguments:
+    if "hook_dispatcher" in params and "hook_dispatcher" not in arguments:
         kwargs["hook_dispatcher"] = ctx.hook_dispatcher
-    if "branch_id" in sig.parameters and "branch_id" not in arguments:
+    if "branch_id" in params and "branch_id" not in arguments:
         kwargs["branch_id"] = ctx.branch_id
-    if "on_tool_progress" in sig.parameters and "on_tool_progress" not in arguments:
+    if "on_tool_progress" in params and "on_tool_progress" not in arguments:
         kwargs["on_tool_progress"] = ctx.on_tool_progress
-    if "bot" in sig.parameters and "bot" not in arguments:
+    if "bot" in params and "bot" not in arguments:
         kwargs["bot"] = ctx.bot
 
     result = await tool.handler(**kwargs)
@@ -401,6 +442,7 @@ async def run_tool_loop(
     inject_queue: asyncio.Queue[dict[str, Any]] | None = None,
     on_event: Callable[[ToolLoopEvent], Awaitable[None]] | None = None,
     web_search_enabled: bool = False,
+    max_parallel_tools: int = 8,
 ) -> ToolLoopResult:
     """Run the agentic tool use loop.
 
@@ -423,6 +465,9 @@ async def run_tool_loop(
     ask_callback:
         Async callback for ASK permission prompts. Called with
         ``(tool_name, arguments_str)`` and returns True if approved.
+    max_parallel_tools:
+        Upper bound on tool calls executing concurrently when a batch runs
+        on the parallel path.  Results are still returned in call order.
 
     Returns
     -------
@@ -472,9 +517,11 @@ async def run_tool_loop(
 
     total_usage = Usage(input_tokens=0, output_tokens=0)
     total_tool_calls = 0
-    tools_used: list[str] = []
+    # Insertion-ordered set of tool names: O(1) membership, first-use order for the UI
+    tools_used: dict[str, None] = {}
     consecutive_errors = 0
-    max_consecutive_errors = 5
+    # Per-message token estimates, reused across iterations by truncation
+    token_cache: dict[int, tuple[dict[str, Any], int]] = {}
 
     for iteration in range(1, max_iterations + 1):
         # Drain injected messages from the queue before each LLM call
@@ -486,20 +533,21 @@ async def run_tool_loop(
                 except asyncio.QueueEmpty:
                     break
 
-        await _fire_event(
-            on_event,
-            ToolLoopEvent(
-                type=ToolLoopEventType.LLM_CALL_START,
-                iteration=iteration,
-                tool_calls_made=total_tool_calls,
-                tools_used=list(tools_used),
-                total_usage=total_usage,
-            ),
-        )
+        if on_event is not None:
+            await _fire_event(
+                on_event,
+                ToolLoopEvent(
+                    type=ToolLoopEventType.LLM_CALL_START,
+                    iteration=iteration,
+                    tool_calls_made=total_tool_calls,
+                    tools_used=list(tools_used),
+                    total_usage=total_usage,
+                ),
+            )
 
         # Truncate to stay within the hard token cap
         working_messages = _truncate_tool_loop_messages(
-            working_messages, MAX_INPUT_TOKENS
+            working_messages, MAX_INPUT_TOKENS, token_cache
         )
 
         response = await provider.chat(
@@ -510,17 +558,18 @@ async def run_tool_loop(
 
         total_usage = total_usage + response.usage
 
-        await _fire_event(
-            on_event,
-            ToolLoopEvent(
-                type=ToolLoopEventType.LLM_CALL_COMPLETE,
-                iteration=iteration,
-                usage_delta=response.usage,
-                total_usage=total_usage,
-                tool_calls_made=total_tool_calls,
-                tools_used=list(tools_used),
-            ),
-        )
+        if on_event is not None:
+            await _fire_event(
+                on_event,
+                ToolLoopEvent(
+                    type=ToolLoopEventType.LLM_CALL_COMPLETE,
+                    iteration=iteration,
+                    usage_delta=response.usage,
+                    total_usage=total_usage,
+                    tool_calls_made=total_tool_calls,
+                    tools_used=list(tools_used),
+                ),
+            )
 
         # Guard: if stop_reason is "max_tokens", tool call arguments may be
         # truncated (the API cut off mid-JSON).  Discard the tool calls and
@@ -548,24 +597,25 @@ async def run_tool_loop(
                 "content": f"[system: {truncation_msg}]",
             })
             consecutive_errors += 1
-            if consecutive_errors >= max_consecutive_errors:
+            if consecutive_errors >= _MAX_CONSECUTIVE_ERRORS:
                 msg = (
                     f"Stopped after {consecutive_errors} consecutive tool errors. "
                     f"The response keeps hitting the output token limit. "
                     f"Total tool calls: {total_tool_calls}, iterations: {iteration}."
                 )
                 logger.warning("Circuit breaker tripped (max_tokens): %s", msg)
-                await _fire_event(
-                    on_event,
-                    ToolLoopEvent(
-                        type=ToolLoopEventType.LOOP_COMPLETE,
-                        iteration=iteration,
-                        total_usage=total_usage,
-                        tool_calls_made=total_tool_calls,
-                        tools_used=list(tools_used),
-                        content_preview=msg[:200],
-                    ),
-                )
+                if on_event is not None:
+                    await _fire_event(
+                        on_event,
+                        ToolLoopEvent(
+                            type=ToolLoopEventType.LOOP_COMPLETE,
+                            iteration=iteration,
+                            total_usage=total_usage,
+                            tool_calls_made=total_tool_calls,
+                            tools_used=list(tools_used),
+                            content_preview=msg[:200],
+                        ),
+                    )
                 return ToolLoopResult(
                     content=msg,
                     messages=working_messages,
@@ -587,17 +637,18 @@ async def run_tool_loop(
                 })
                 continue
 
-            await _fire_event(
-                on_event,
-                ToolLoopEvent(
-                    type=ToolLoopEventType.LOOP_COMPLETE,
-                    iteration=iteration,
-                    total_usage=total_usage,
-                    tool_calls_made=total_tool_calls,
-                    tools_used=list(tools_used),
-                    content_preview=(response.content or "")[:200],
-                ),
-            )
+            if on_event is not None:
+                await _fire_event(
+                    on_event,
+                    ToolLoopEvent(
+                        type=ToolLoopEventType.LOOP_COMPLETE,
+                        iteration=iteration,
+                        total_usage=total_usage,
+                        tool_calls_made=total_tool_calls,
+                        tools_used=list(tools_used),
+                        content_preview=(response.content or "")[:200],
+                    ),
+                )
             return ToolLoopResult(
                 content=response.content,
                 messages=working_messages,
@@ -632,6 +683,7 @@ async def run_tool_loop(
             results = await _run_parallel(
                 response.tool_calls, tools, ctx, ask_callback,
                 on_event, iteration, total_tool_calls, list(tools_used), total_usage,
+                max_parallel_tools,
             )
 
             batch_errors = 0
@@ -655,8 +707,7 @@ async def run_tool_loop(
                     }
                 )
                 total_tool_calls += 1
-                if tc.name not in tools_used:
-                    tools_used.append(tc.name)
+                tools_used[tc.name] = None
                 if tool_cost > 0:
                     total_usage = total_usage + Usage(
                         input_tokens=0, output_tokens=0, cost_usd=tool_cost
@@ -670,18 +721,19 @@ async def run_tool_loop(
         else:
             # Sequential execution
             for tc in response.tool_calls:
-                await _fire_event(
-                    on_event,
-                    ToolLoopEvent(
-                        type=ToolLoopEventType.TOOL_CALL_START,
-                        iteration=iteration,
-                        tool_name=tc.name,
-                        tool_arguments=tc.arguments,
-                        tool_calls_made=total_tool_calls,
-                        tools_used=list(tools_used),
-                        total_usage=total_usage,
-                    ),
-                )
+                if on_event is not None:
+                    await _fire_event(
+                        on_event,
+                        ToolLoopEvent(
+                            type=ToolLoopEventType.TOOL_CALL_START,
+                            iteration=iteration,
+                            tool_name=tc.name,
+                            tool_arguments=tc.arguments,
+                            tool_calls_made=total_tool_calls,
+                            tools_used=list(tools_used),
+                            total_usage=total_usage,
+                        ),
+                    )
 
                 result_content, tool_cost = await _handle_tool_call(
                     tc, tools, ctx, ask_callback
@@ -694,8 +746,7 @@ async def run_tool_loop(
                     }
                 )
                 total_tool_calls += 1
-                if tc.name not in tools_used:
-                    tools_used.append(tc.name)
+                tools_used[tc.name] = None
                 if tool_cost > 0:
                     total_usage = total_usage + Usage(
                         input_tokens=0, output_tokens=0, cost_usd=tool_cost
@@ -707,37 +758,39 @@ async def run_tool_loop(
                 else:
                     consecutive_errors = 0
 
-                await _fire_event(
-                    on_event,
-                    ToolLoopEvent(
-                        type=ToolLoopEventType.TOOL_CALL_COMPLETE,
-                        iteration=iteration,
-                        tool_name=tc.name,
-                        tool_calls_made=total_tool_calls,
-                        tools_used=list(tools_used),
-                        total_usage=total_usage,
-                    ),
-                )
+                if on_event is not None:
+                    await _fire_event(
+                        on_event,
+                        ToolLoopEvent(
+                            type=ToolLoopEventType.TOOL_CALL_COMPLETE,
+                            iteration=iteration,
+                            tool_name=tc.name,
+                            tool_calls_made=total_tool_calls,
+                            tools_used=list(tools_used),
+                            total_usage=total_usage,
+                        ),
+                    )
 
         # Circuit breaker: stop if too many consecutive errors
-        if consecutive_errors >= max_consecutive_errors:
+        if consecutive_errors >= _MAX_CONSECUTIVE_ERRORS:
             msg = (
                 f"Stopped after {consecutive_errors} consecutive tool errors. "
                 f"The LLM may be sending invalid arguments repeatedly. "
                 f"Total tool calls: {total_tool_calls}, iterations: {iteration}."
             )
             logger.warning("Circuit breaker tripped: %s", msg)
-            await _fire_event(
-                on_event,
-                ToolLoopEvent(
-                    type=ToolLoopEventType.LOOP_COMPLETE,
-                    iteration=iteration,
-                    total_usage=total_usage,
-                    tool_calls_made=total_tool_calls,
-                    tools_used=list(tools_used),
-                    content_preview=msg[:200],
-                ),
-            )
+            if on_event is not None:
+                await _fire_event(
+                    on_event,
+                    ToolLoopEvent(
+                        type=ToolLoopEventType.LOOP_COMPLETE,
+                        iteration=iteration,
+                        total_usage=total_usage,
+                        tool_calls_made=total_tool_calls,
+                        tools_used=list(tools_used),
+                        content_preview=msg[:200],
+                    ),
+                )
             return ToolLoopResult(
                 content=msg,
                 messages=working_messages,
@@ -747,16 +800,17 @@ async def run_tool_loop(
             )
 
     # Reached max iterations
-    await _fire_event(
-        on_event,
-        ToolLoopEvent(
-            type=ToolLoopEventType.LOOP_COMPLETE,
-            iteration=max_iterations,
-            total_usage=total_usage,
-            tool_calls_made=total_tool_calls,
-            tools_used=list(tools_used),
-        ),
-    )
+    if on_event is not None:
+        await _fire_event(
+            on_event,
+            ToolLoopEvent(
+                type=ToolLoopEventType.LOOP_COMPLETE,
+                iteration=max_iterations,
+                total_usage=total_usage,
+                tool_calls_made=total_tool_calls,
+                tools_used=list(tools_used),
+            ),
+        )
     return ToolLoopResult(
         content=f"Stopped after max iterations ({max_iterations}). The task may be incomplete.",
         messages=working_messages,
@@ -776,40 +830,69 @@ async def _run_parallel(
     tool_calls_made: int,
     tools_used: list[str],
     total_usage: Usage,
+    max_parallel_tools: int = 8,
 ) -> list[tuple[str, float, str] | BaseException]:
-    """Run multiple tool calls concurrently via asyncio.gather."""
+    """Run multiple tool calls concurrently in an :class:`asyncio.TaskGroup`.
+
+    At most ``max_parallel_tools`` calls are in flight at once; the rest
+    wait on a semaphore.  Results keep the order of ``tool_calls``; a call
+    that raises yields its exception in place without cancelling the
+    others.  Cancelling the caller cancels every in-flight tool.
+    """
+    sem = asyncio.Semaphore(max(1, max_parallel_tools))
 
     async def _run_one(tc: ToolCall) -> tuple[str, float, str]:
-        await _fire_event(
-            on_event,
-            ToolLoopEvent(
-                type=ToolLoopEventType.TOOL_CALL_START,
-                iteration=iteration,
-                tool_name=tc.name,
-                tool_arguments=tc.arguments,
-                tool_calls_made=tool_calls_made,
-                tools_used=list(tools_used),
-                total_usage=total_usage,
-            ),
-        )
-        result_content, cost = await _handle_tool_call(tc, tools, ctx, ask_callback)
-        await _fire_event(
-            on_event,
-            ToolLoopEvent(
-                type=ToolLoopEventType.TOOL_CALL_COMPLETE,
-                iteration=iteration,
-                tool_name=tc.name,
-                tool_calls_made=tool_calls_made,
-                tools_used=list(tools_used),
-                total_usage=total_usage,
-            ),
-        )
-        return result_content, cost, tc.name
+        async with sem:
+            if on_event is not None:
+                await _fire_event(
+                    on_event,
+                    ToolLoopEvent(
+                        type=ToolLoopEventType.TOOL_CALL_START,
+                        iteration=iteration,
+                        tool_name=tc.name,
+                        tool_arguments=tc.arguments,
+                        tool_calls_made=tool_calls_made,
+                        tools_used=list(tools_used),
+                        total_usage=total_usage,
+                    ),
+                )
+            result_content, cost = await _handle_tool_call(tc, tools, ctx, ask_callback)
+            if on_event is not None:
+                await _fire_event(
+                    on_event,
+                    ToolLoopEvent(
+                        type=ToolLoopEventType.TOOL_CALL_COMPLETE,
+                        iteration=iteration,
+                        tool_name=tc.name,
+                        tool_calls_made=tool_calls_made,
+                        tools_used=list(tools_used),
+                        total_usage=total_usage,
+                    ),
+                )
+            return result_content, cost, tc.name
 
-    return await asyncio.gather(
-        *[_run_one(tc) for tc in tool_calls],
-        return_exceptions=True,
-    )
+    results: list[tuple[str, float, str] | BaseException | None] = [None] * len(tool_calls)
+
+    async def _collect(index: int, tc: ToolCall) -> None:
+        try:
+            results[index] = await _run_one(tc)
+        except Exception as exc:
+            results[index] = exc
+        except asyncio.CancelledError as exc:
+            # A handler raising CancelledError on its own is a per-tool error,
+            # as it was under gather(return_exceptions=True).  Only a real
+            # cancellation of this task (outer cancel or sibling failure)
+            # propagates.
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                raise
+            results[index] = exc
+
+    async with asyncio.TaskGroup() as tg:
+        for index, tc in enumerate(tool_calls):
+            tg.create_task(_collect(index, tc))
+
+    return [r for r in results if r is not None]
 
 
 def _can_run_parallel(
@@ -878,8 +961,7 @@ async def _handle_tool_call(
         result_str = await _execute_tool(tool, tc.arguments, ctx)
     except TypeError as exc:
         # Provide detailed info about provided vs expected arguments
-        sig = inspect.signature(tool.handler)
-        expected = list(sig.parameters.keys())
+        expected = list(tool.handler_params)
         provided = list(tc.arguments.keys())
         msg = (
             f"TypeError calling '{tc.name}': {exc}\n"
@@ -901,4 +983,6 @@ async def _handle_tool_call(
         except (json.JSONDecodeError, TypeError):
             pass
 
+    result_str = _cap_tool_result(result_str)
+
     return result_str, cost_usd
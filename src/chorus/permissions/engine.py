@@ -10,7 +10,16 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Protocol
+
+try:
+    import re2
+except ImportError:  # optional ``re2`` extra
+    re2 = None
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping, Sequence
 
 # ---------------------------------------------------------------------------
 # Errors
@@ -38,49 +47,176 @@ class PermissionResult(Enum):
     DENY = "deny"
 
 
+# Module-level aliases: a global load is cheaper than enum attribute access
+# on the ``check`` hot path.  Same singleton members, so ``is`` still holds.
+_ALLOW = PermissionResult.ALLOW
+_ASK = PermissionResult.ASK
+_DENY = PermissionResult.DENY
+
+
 # ---------------------------------------------------------------------------
 # PermissionProfile
 # ---------------------------------------------------------------------------
 
 
-@dataclass
+class _Matcher(Protocol):
+    """The part of a compiled pattern ``check`` needs (``re`` or RE2)."""
+
+    def fullmatch(self, string: str) -> object: ...
+
+
+# Backreferences and conditional groups would point at the wrong group once
+# patterns are joined.
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+# Syntax RE2 reads differently from ``re`` whatever the action: ``$`` (``re``
+# also matches before a trailing newline), POSIX ``[:alpha:]`` classes and
+# ``{,n}`` repeats.  Lists using any of it, or non-ASCII patterns (case
+# folding differs), never get an RE2 matcher.
+_RE2_DIVERGENT_SYNTAX = re.compile(r"\$|\[:|\{,")
+
+# RE2's ``\d``/``\w``/``\b`` are ASCII-only and its ``\s`` lacks ``\v`` and
+# ``\x1c``-``\x1f``.  Actions free of those characters get the same verdict
+# from both engines; any other action stays on ``re``.
+_RE2_DIVERGENT_INPUT = re.compile(r"[^\x00-\x0a\x0c-\x1b\x20-\x7f]")
+
+# Actions longer than this are matched with RE2 when it is installed.  Below
+# it backtracking is cheap and ``re`` beats RE2's per-call overhead.
+_LINEAR_MATCH_MIN_LEN = 512
+
+
+def _join(compiled: Sequence[re.Pattern[str]], *, possessive_tail: bool = False) -> str | None:
+    """Return *compiled* as one alternation source, or ``None`` if unsafe to join.
+
+    With *possessive_tail*, a trailing ``.*``/``.+`` becomes ``.*+``/``.++``.
+    Under ``fullmatch`` giving back characters from the very end can never
+    reach the end of the string, so this only skips a doomed backtrack (e.g.
+    ``tool:bash:.*`` against a multi-line command).
+    """
+    if not compiled or any(_BACKREFERENCE.search(p.pattern) for p in compiled):
+        return None
+    patterns = [p.pattern for p in compiled]
+    if possessive_tail:
+        patterns = [p + "+" if p.endswith((".*", ".+")) else p for p in patterns]
+    return "|".join(f"(?:{p})" for p in patterns)
+
+
+def _union(source: str | None) -> re.Pattern[str] | None:
+    """Compile a joined alternation; ``None`` if it does not compile.
+
+    The joined form can fail where its parts did not (mid-pattern global
+    flags, duplicate group names); ``check`` then matches one by one.
+    """
+    if source is None:
+        return None
+    try:
+        return re.compile(source)
+    except re.error:
+        return None
+
+
+def _compile_linear(compiled: Sequence[re.Pattern[str]]) -> _Matcher | None:
+    """Join *compiled* and compile it with RE2 when the ``re2`` extra is installed.
+
+    RE2 matches in time linear in the action length, which keeps broad
+    ``.*``-heavy deny patterns cheap on long bash commands.  Returns
+    ``None`` when RE2 is missing, rejects the syntax (e.g. lookaheads), or
+    could read a pattern differently from ``re``.
+    """
+    if re2 is None or any(
+        not p.pattern.isascii() or _RE2_DIVERGENT_SYNTAX.search(p.pattern) for p in compiled
+    ):
+        return None
+    source = _join(compiled)
+    if source is None:
+        return None
+    options = re2.Options()
+    options.log_errors = False
+    try:
+        return re2.compile(source, options)  # type: ignore[no-any-return]
+    except re2.error:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
 class PermissionProfile:
     """A set of regex patterns that control what an agent may do.
 
-    Patterns are compiled once at construction time.  Invalid patterns
-    raise :exc:`InvalidPermissionPatternError` immediately.
+    Patterns are compiled once at construction time, and each list is also
+    joined into a single alternation for matching.  Invalid patterns raise
+    :exc:`InvalidPermissionPatternError` immediately.  Profiles are frozen
+    and the pattern lists are stored as tuples, so the compiled forms can
+    never drift from them.
 
     Matching order: deny → allow → ask → implicit deny.
     """
 
-    allow: list[str]
-    ask: list[str]
-    deny: list[str] = field(default_factory=list)
-    _compiled_allow: list[re.Pattern[str]] = field(init=False, repr=False)
-    _compiled_ask: list[re.Pattern[str]] = field(init=False, repr=False)
-    _compiled_deny: list[re.Pattern[str]] = field(init=False, repr=False)
+    # Any sequence is accepted; stored as tuples by ``__post_init__``
+    allow: Sequence[str]
+    ask: Sequence[str]
+    deny: Sequence[str] = ()
+    _compiled_allow: tuple[re.Pattern[str], ...] = field(init=False, repr=False)
+    _compiled_ask: tuple[re.Pattern[str], ...] = field(init=False, repr=False)
+    _compiled_deny: tuple[re.Pattern[str], ...] = field(init=False, repr=False)
+    _union_allow: re.Pattern[str] | None = field(init=False, repr=False)
+    _union_ask: re.Pattern[str] | None = field(init=False, repr=False)
+    _union_deny: re.Pattern[str] | None = field(init=False, repr=False)
+    # RE2 versions of the unions for long actions, per list (deny, allow, ask);
+    # ``None`` when RE2 is unavailable for every list.
+    _linear: tuple[_Matcher | None, _Matcher | None, _Matcher | None] | None = field(
+        init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         try:
-            self._compiled_deny = [re.compile(p) for p in self.deny]
+            compiled_deny = tuple(re.compile(p) for p in self.deny)
         except re.error as exc:
             raise InvalidPermissionPatternError(f"Invalid deny pattern: {exc}") from exc
         try:
-            self._compiled_allow = [re.compile(p) for p in self.allow]
+            compiled_allow = tuple(re.compile(p) for p in self.allow)
         except re.error as exc:
             raise InvalidPermissionPatternError(f"Invalid allow pattern: {exc}") from exc
         try:
-            self._compiled_ask = [re.compile(p) for p in self.ask]
+            compiled_ask = tuple(re.compile(p) for p in self.ask)
         except re.error as exc:
             raise InvalidPermissionPatternError(f"Invalid ask pattern: {exc}") from exc
+        union_deny = _union(_join(compiled_deny, possessive_tail=True))
+        union_allow = _union(_join(compiled_allow, possessive_tail=True))
+        union_ask = _union(_join(compiled_ask, possessive_tail=True))
+        # RE2 never backtracks and rejects possessive quantifiers.
+        linear = (
+            _compile_linear(compiled_deny),
+            _compile_linear(compiled_allow),
+            _compile_linear(compiled_ask),
+        )
+        # Lists RE2 cannot compile keep their ``re`` union.
+        linear_or_none = (
+            (linear[0] or union_deny, linear[1] or union_allow, linear[2] or union_ask)
+            if any(m is not None for m in linear)
+            else None
+        )
+        # Frozen: derived fields are set through ``object.__setattr__``.
+        for name, value in (
+            ("allow", tuple(self.allow)),
+            ("ask", tuple(self.ask)),
+            ("deny", tuple(self.deny)),
+            ("_compiled_deny", compiled_deny),
+            ("_compiled_allow", compiled_allow),
+            ("_compiled_ask", compiled_ask),
+            ("_union_deny", union_deny),
+            ("_union_allow", union_allow),
+            ("_union_ask", union_ask),
+            ("_linear", linear_or_none),
+        ):
+            object.__setattr__(self, name, value)
 
     # -- Serialization -------------------------------------------------------
 
     def to_dict(self) -> dict[str, Any]:
         """Serialize to a JSON-compatible dict."""
-        d: dict[str, Any] = {"allow": self.allow, "ask": self.ask}
+        d: dict[str, Any] = {"allow": list(self.allow), "ask": list(self.ask)}
         if self.deny:
-            d["deny"] = self.deny
+            d["deny"] = list(self.deny)
         return d
 
     @classmethod
@@ -100,16 +236,41 @@ def check(action: str, profile: PermissionProfile) -> PermissionResult:
     Matching order: deny → allow → ask → implicit deny.  Uses ``fullmatch``
     so the entire action string must match the pattern.
     """
-    for pattern in profile._compiled_deny:
-        if pattern.fullmatch(action):
-            return PermissionResult.DENY
-    for pattern in profile._compiled_allow:
-        if pattern.fullmatch(action):
-            return PermissionResult.ALLOW
-    for pattern in profile._compiled_ask:
-        if pattern.fullmatch(action):
-            return PermissionResult.ASK
-    return PermissionResult.DENY
+    # Each list is tried through its joined alternation when one exists
+    # (a single match call), otherwise pattern by pattern.
+    deny: _Matcher | None
+    allow: _Matcher | None
+    ask: _Matcher | None
+    if (
+        profile._linear is not None
+        and len(action) > _LINEAR_MATCH_MIN_LEN
+        and _RE2_DIVERGENT_INPUT.search(action) is None
+    ):
+        deny, allow, ask = profile._linear
+    else:
+        deny, allow, ask = profile._union_deny, profile._union_allow, profile._union_ask
+    if deny is not None:
+        if deny.fullmatch(action):
+            return _DENY
+    else:
+        for pattern in profile._compiled_deny:
+            if pattern.fullmatch(action):
+                return _DENY
+    if allow is not None:
+        if allow.fullmatch(action):
+            return _ALLOW
+    else:
+        for pattern in profile._compiled_allow:
+            if pattern.fullmatch(action):
+                return _ALLOW
+    if ask is not None:
+        if ask.fullmatch(action):
+            return _ASK
+    else:
+        for pattern in profile._compiled_ask:
+            if pattern.fullmatch(action):
+                return _ASK
+    return _DENY
 
 
 # ---------------------------------------------------------------------------
@@ -126,7 +287,10 @@ def format_action(tool_name: str, detail: str = "") -> str:
 # Built-in presets
 # ---------------------------------------------------------------------------
 
-PRESETS: dict[str, PermissionProfile] = {
+# Built eagerly at import so pattern compilation and joining are paid once,
+# not on the first permission check.  Read-only so no caller can swap out or
+# add a preset at runtime.
+PRESETS: Mapping[str, PermissionProfile] = MappingProxyType({
     "open": PermissionProfile(allow=[".*"], ask=[]),
     "standard": PermissionProfile(
         allow=[
@@ -162,7 +326,7 @@ PRESETS: dict[str, PermissionProfile] = {
         ask=[],
     ),
     "locked": PermissionProfile(allow=[r"tool:file:view.*"], ask=[]),
-}
+})
 
 
 def get_preset(name: str) -> PermissionProfile:
@@ -146,6 +146,12 @@ _DEFAULT_CALLBACK = ProcessCallback(
     max_fires=1,
 )
 
+# Value → member tables for the LLM's enum strings.  A dict miss is a cheap
+# ``None`` instead of the ValueError an ``Enum(value)`` call raises.
+_TRIGGER_TYPES: dict[str, TriggerType] = {t.value: t for t in TriggerType}
+_EXIT_FILTERS: dict[str, ExitFilter] = {f.value: f for f in ExitFilter}
+_CALLBACK_ACTIONS: dict[str, CallbackAction] = {a.value: a for a in CallbackAction}
+
 
 async def build_callbacks_from_instructions(
     instructions: str,
@@ -202,12 +208,9 @@ def _parse_callbacks(
     # Strip markdown code fences if present
     text = raw_output.strip()
     if text.startswith("```"):
-        lines = text.split("\n")
-        # Remove first and last lines (fences)
-        lines = lines[1:]
-        if lines and lines[-1].strip() == "```":
-            lines = lines[:-1]
-        text = "\n".join(lines)
+        # Drop the opening fence line (including any language tag) and the
+        # closing fence without splitting the whole payload into lines
+        text = text.partition("\n")[2].removesuffix("```").strip()
 
     try:
         data = json.loads(text)
@@ -223,7 +226,7 @@ def _parse_callbacks(
         try:
             cb = _parse_single_callback(item, default_output_delay)
             callbacks.append(cb)
-        except (KeyError, ValueError) as exc:
+        except (KeyError, TypeError, ValueError) as exc:
             logger.warning("Skipping invalid callback: %s — %s", item, exc)
             continue
 
@@ -236,9 +239,15 @@ def _parse_single_callback(
 ) -> ProcessCallback:
     """Parse a single callback dict from the LLM output."""
     trigger_data = item.get("trigger", {})
-    trigger_type = TriggerType(trigger_data.get("type", "on_exit"))
-
-    exit_filter = ExitFilter(trigger_data.get("exit_filter", "any"))
+    raw_type = trigger_data.get("type", "on_exit")
+    trigger_type = _TRIGGER_TYPES.get(raw_type)
+    if trigger_type is None:
+        raise ValueError(f"unknown trigger type {raw_type!r}")
+
+    raw_filter = trigger_data.get("exit_filter", "any")
+    exit_filter = _EXIT_FILTERS.get(raw_filter)
+    if exit_filter is None:
+        raise ValueError(f"unknown exit filter {raw_filter!r}")
     pattern = trigger_data.get("pattern")
     timeout_seconds = trigger_data.get("timeout_seconds")
 
@@ -249,7 +258,10 @@ def _parse_single_callback(
         timeout_seconds=timeout_seconds,
     )
 
-    action = CallbackAction(item.get("action", "spawn_branch"))
+    raw_action = item.get("action", "spawn_branch")
+    action = _CALLBACK_ACTIONS.get(raw_action)
+    if action is None:
+        raise ValueError(f"unknown callback action {raw_action!r}")
     context_message = item.get("context_message", "")
 
     # Use default delay for output match if not specified
@@ -86,7 +86,9 @@ class HookDispatcher:
         self._max_recursion_depth = max_recursion_depth
         self._spawn_semaphore = asyncio.Semaphore(3)
         self._pending_delays: dict[int, asyncio.Task[None]] = {}
-        self._timeout_tasks: dict[int, asyncio.Task[None]] = {}
+        self._timeout_handles: dict[int, list[asyncio.TimerHandle]] = {}
+        # Strong references to timeout fires in flight (the loop keeps weak ones).
+        self._timeout_fires: set[asyncio.Task[None]] = set()
 
     def wire_to_manager(self) -> None:
         """Connect this dispatcher to the ProcessManager's callbacks."""
@@ -108,15 +110,7 @@ class HookDispatcher:
         if tracked is None:
             return
         for cb in tracked.callbacks:
-            if (
-                cb.trigger.type == TriggerType.ON_TIMEOUT
-                and cb.trigger.timeout_seconds is not None
-                and not cb.exhausted
-            ):
-                task = asyncio.create_task(
-                    self._timeout_watcher(pid, cb)
-                )
-                self._timeout_tasks[pid] = task
+            self._schedule_timeout(pid, cb)
 
     def start_new_timeout_watchers(
         self, pid: int, new_callbacks: list[ProcessCallback]
@@ -126,31 +120,36 @@ class HookDispatcher:
         if tracked is None:
             return
         for cb in new_callbacks:
-            if (
-                cb.trigger.type == TriggerType.ON_TIMEOUT
-                and cb.trigger.timeout_seconds is not None
-                and not cb.exhausted
-            ):
-                task = asyncio.create_task(
-                    self._timeout_watcher(pid, cb)
-                )
-                self._timeout_tasks[pid] = task
-
-    async def _timeout_watcher(self, pid: int, cb: ProcessCallback) -> None:
-        """Wait for the timeout duration and then fire the callback."""
-        assert cb.trigger.timeout_seconds is not None
-        try:
-            await asyncio.sleep(cb.trigger.timeout_seconds)
-        except asyncio.CancelledError:
+            self._schedule_timeout(pid, cb)
+
+    def _schedule_timeout(self, pid: int, cb: ProcessCallback) -> None:
+        """Arm a timer for *cb* if it is a live ON_TIMEOUT callback.
+
+        A bare ``call_later`` handle is far cheaper to create and cancel than
+        a task sleeping on the timeout; a task is only made if it fires.
+        """
+        if (
+            cb.trigger.type != TriggerType.ON_TIMEOUT
+            or cb.trigger.timeout_seconds is None
+            or cb.exhausted
+        ):
             return
+        handle = asyncio.get_running_loop().call_later(
+            cb.trigger.timeout_seconds, self._on_timeout, pid, cb
+        )
+        self._timeout_handles.setdefault(pid, []).append(handle)
 
+    def _on_timeout(self, pid: int, cb: ProcessCallback) -> None:
+        """Timer callback — fire *cb* if the process is still running."""
         tracked = self._pm.get_process(pid)
         if tracked is None or tracked.status != ProcessStatus.RUNNING:
             return
         if cb.exhausted:
             return
 
-        await self._fire_callback(pid, cb, "Process timed out")
+        task = asyncio.create_task(self._fire_callback(pid, cb, "Process timed out"))
+        self._timeout_fires.add(task)
+        task.add_done_callback(self._timeout_fires.discard)
 
     # ── Event handlers (wired to ProcessManager) ─────────────────────
 
@@ -165,10 +164,7 @@ class HookDispatcher:
                 continue
             if cb.exhausted:
                 continue
-            pattern = cb.trigger.compiled_pattern
-            if pattern is None:
-                continue
-            if not pattern.search(line):
+            if not cb.trigger.matches(line):
                 continue
 
             # Matched!
@@ -191,9 +187,8 @@ class HookDispatcher:
     async def _on_exit(self, pid: int, exit_code: int | None) -> None:
         """Called when a process exits — evaluates ON_EXIT triggers."""
         # Cancel any pending timeout watchers
-        timeout_task = self._timeout_tasks.pop(pid, None)
-        if timeout_task is not None and not timeout_task.done():
-            timeout_task.cancel()
+        for handle in self._timeout_handles.pop(pid, ()):
+            handle.cancel()
 
         tracked = self._pm.get_process(pid)
         if tracked is None:
@@ -223,15 +218,33 @@ class HookDispatcher:
     async def _delayed_fire(
         self, pid: int, cb: ProcessCallback, trigger_line: str, delay: float
     ) -> None:
-        """Wait for delay, accumulating output, then fire."""
+        """Wait for delay, accumulating output, then fire.
+
+        Matches that arrive while the delay for *cb* is still running are
+        coalesced into it — their lines reach the context through the
+        rolling tail — so a burst schedules one task, not one per line.
+        The slot is released as soon as the delay ends, so a match during
+        the (possibly slow) dispatch schedules a fire of its own.
+        """
         key = id(cb)
+        pending = self._pending_delays.get(key)
+        if pending is not None and not pending.done():
+            return
         logger.debug(
             "Scheduling delayed fire for pid %d: delay=%.1fs trigger=%r",
             pid, delay, trigger_line,
         )
 
+        def _release(task: asyncio.Task[None] | None) -> None:
+            # Only drop the slot if it still holds *task*; a later match may
+            # already have stored a newer one under the same key.
+            if task is not None and self._pending_delays.get(key) is task:
+                del self._pending_delays[key]
+
         async def _wait_and_fire() -> None:
             await asyncio.sleep(delay)
+            # The tail is captured below; later matches need their own fire
+            _release(asyncio.current_task())
             tracked = self._pm.get_process(pid)
             if tracked is None:
                 logger.warning(
@@ -249,6 +262,8 @@ class HookDispatcher:
 
         task = asyncio.create_task(_wait_and_fire())
         self._pending_delays[key] = task
+        # Also covers a task cancelled or failing during the sleep
+        task.add_done_callback(_release)
 
     # ── Action dispatch ────────────────────────────────────────────────
 
@@ -14,6 +14,7 @@ from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 from chorus.process.models import (
+    ROLLING_TAIL_MAX,
     ProcessCallback,
     ProcessStatus,
     ProcessType,
@@ -164,7 +165,7 @@ class ProcessManager:
         now = datetime.now(UTC).isoformat()
         log_dir = self._chorus_home / "agents" / agent_name / "processes" / str(pid)
 
-        rolling_tail: deque[str] = deque(maxlen=100)
+        rolling_tail: deque[str] = deque(maxlen=ROLLING_TAIL_MAX)
 
         tracked = TrackedProcess(
             pid=pid,
@@ -9,6 +9,12 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any
 
+# Lines of combined stdout/stderr kept in memory per process for hook context.
+ROLLING_TAIL_MAX = 100
+
+# Characters that make an output-match pattern more than a plain substring.
+_REGEX_METACHARS = frozenset(".^$*+?{}[]|()\\")
+
 # ---------------------------------------------------------------------------
 # Enums
 # ---------------------------------------------------------------------------
@@ -74,6 +80,10 @@ class HookTrigger:
     _compiled: re.Pattern[str] | None = field(
         init=False, repr=False, default=None, compare=False,
     )
+    # The pattern itself when it has no regex metacharacters (set with _compiled)
+    _literal: str | None = field(
+        init=False, repr=False, default=None, compare=False,
+    )
 
     @property
     def compiled_pattern(self) -> re.Pattern[str] | None:
@@ -82,8 +92,23 @@ class HookTrigger:
             return None
         if self._compiled is None:
             self._compiled = re.compile(self.pattern)
+            if not _REGEX_METACHARS.intersection(self.pattern):
+                self._literal = self.pattern
         return self._compiled
 
+    def matches(self, line: str) -> bool:
+        """Return True if *line* matches this ON_OUTPUT_MATCH trigger.
+
+        Metacharacter-free patterns (``ERROR``, ``Server started``) skip the
+        regex engine and use a plain substring test.
+        """
+        compiled = self._compiled or self.compiled_pattern
+        if compiled is None:
+            return False
+        if self._literal is not None:
+            return self._literal in line
+        return compiled.search(line) is not None
+
     def to_dict(self) -> dict[str, Any]:
         d: dict[str, Any] = {"type": self.type.value}
         if self.exit_filter != ExitFilter.ANY:
@@ -165,7 +190,7 @@ class TrackedProcess:
     exit_code: int | None = None
     callbacks: list[ProcessCallback] = field(default_factory=list)
     context: str = ""
-    rolling_tail: deque[str] = field(default_factory=lambda: deque(maxlen=100))
+    rolling_tail: deque[str] = field(default_factory=lambda: deque(maxlen=ROLLING_TAIL_MAX))
     model_for_hooks: str | None = None
     hook_recursion_depth: int = 0
     discord_message_id: int | None = None
@@ -211,7 +236,7 @@ class TrackedProcess:
             exit_code=data.get("exit_code"),
             callbacks=callbacks,
             context=data.get("context", ""),
-            rolling_tail=deque(tail, maxlen=100),
+            rolling_tail=deque(tail, maxlen=ROLLING_TAIL_MAX),
             model_for_hooks=data.get("model_for_hooks"),
             hook_recursion_depth=data.get("hook_recursion_depth", 0),
             discord_message_id=data.get("discord_message_id"),
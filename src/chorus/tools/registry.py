@@ -2,12 +2,23 @@
 
 from __future__ import annotations
 
+import inspect
 from dataclasses import dataclass
+from functools import cached_property
 from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
     from collections.abc import Awaitable, Callable
 
+# Parameters injected by the tool loop from its execution context, never
+# provided by the LLM.
+CONTEXT_INJECTED_PARAMS = frozenset({
+    "workspace", "profile", "agent_name", "chorus_home",
+    "is_admin", "db", "host_execution", "scope_path",
+    "process_manager", "branch_id", "on_tool_progress",
+    "hook_dispatcher", "bot",
+})
+
 
 @dataclass
 class ToolDefinition:
@@ -18,6 +29,18 @@ class ToolDefinition:
     parameters: dict[str, Any]  # JSON Schema
     handler: Callable[..., Awaitable[Any]]
 
+    @cached_property
+    def llm_required(self) -> tuple[str, ...]:
+        """Required schema parameters the LLM must supply, in schema order."""
+        return tuple(
+            r for r in self.parameters.get("required", []) if r not in CONTEXT_INJECTED_PARAMS
+        )
+
+    @cached_property
+    def handler_params(self) -> tuple[str, ...]:
+        """Parameter names of ``handler``, from a single ``inspect.signature`` call."""
+        return tuple(inspect.signature(self.handler).parameters)
+
 
 class ToolRegistry:
     """Stores and retrieves tool definitions by name."""
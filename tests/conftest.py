@@ -19,6 +19,12 @@ from chorus.config import BotConfig
 from chorus.storage.db import Database
 
 
+@pytest.fixture(autouse=True)
+def _char_token_estimates(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Keep token estimates at chars/4 even when the tokenizer extra is installed."""
+    monkeypatch.setattr("chorus.agent.context._get_encoder", lambda: None)
+
+
 @pytest.fixture
 def tmp_chorus_home(tmp_path: Path) -> Path:
     """Create a temporary ~/.chorus-agents/ structure."""
@@ -6,7 +6,7 @@ import json
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import TYPE_CHECKING
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -17,8 +17,11 @@ from chorus.agent.context import (
     MAX_INPUT_TOKENS,
     ContextManager,
     _get_context_limit,
+    _get_encoder,
+    _json_size,
     _truncate_to_budget,
     build_llm_context,
+    estimate_message_tokens,
     estimate_tokens,
 )
 from chorus.agent.threads import ThreadManager
@@ -518,6 +521,80 @@ class TestEstimateTokens:
         assert tokens > 0
         assert tokens < len(text)  # Should be less than char count
 
+    def test_uses_encoder_when_available(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        encoder = MagicMock()
+        encoder.encode.return_value = [1, 2, 3]
+        monkeypatch.setattr("chorus.agent.context._get_encoder", lambda: encoder)
+        assert estimate_tokens("a" * 100) == 3
+        encoder.encode.assert_called_once_with("a" * 100, disallowed_special=())
+
+    def test_message_parts_share_the_encoder_unit(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Tool-call arguments and raw blocks are encoded too, not chars / 4."""
+        encoder = MagicMock()
+        encoder.encode.side_effect = lambda text, disallowed_special: text.split()
+        monkeypatch.setattr("chorus.agent.context._get_encoder", lambda: encoder)
+        msg = {
+            "role": "assistant",
+            "content": "one two",
+            "tool_calls": [{"name": "bash", "arguments": {"command": "ls -la /tmp"}}],
+            "_anthropic_content": [{"type": "text", "text": "x y z"}],
+        }
+        # 4 overhead + 2 content + 1 name + 4 args + 6 raw-block "words"
+        assert estimate_message_tokens(msg) == 17
+
+    def test_real_tiktoken_encoder(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """With the tokenizer extra, counts are cl100k_base BPE token counts."""
+        tiktoken = pytest.importorskip("tiktoken")
+        try:
+            encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            pytest.skip("cl100k_base BPE file unavailable")
+        # Imported before the autouse fixture swapped it out
+        _get_encoder.cache_clear()
+        monkeypatch.setattr("chorus.agent.context._get_encoder", _get_encoder)
+
+        text = "The quick brown fox jumps over the lazy dog."
+        text_tokens = len(encoding.encode(text))
+        # Real BPE, not the chars / 4 fallback
+        assert estimate_tokens(text) == text_tokens != len(text) // 4
+        args = {"command": "ls -la /tmp"}
+        msg = {
+            "role": "assistant",
+            "content": text,
+            "tool_calls": [{"name": "bash", "arguments": args}],
+        }
+        expected = (
+            4 + text_tokens + len(encoding.encode("bash")) + len(encoding.encode(json.dumps(args)))
+        )
+        assert estimate_message_tokens(msg) == expected
+
+    def test_history_truncation_does_not_encode(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """build_llm_context's truncation stays at chars / 4 with an encoder present."""
+        encoder = MagicMock()
+        monkeypatch.setattr("chorus.agent.context._get_encoder", lambda: encoder)
+        messages = [{"role": "user", "content": "a" * 400} for _ in range(10)]
+        # 4 overhead + 100 per message: three fit in 312
+        assert len(_truncate_to_budget(messages, 312)) == 3
+        encoder.encode.assert_not_called()
+
+
+class TestJsonSize:
+    @pytest.mark.parametrize(
+        "obj",
+        [
+            {},
+            [],
+            "text",
+            {"command": "ls -la", "timeout": 30, "verbose": True, "cwd": None},
+            {"nested": {"items": [1, 2.5, False], "empty": {}}, "n": -3},
+            [{"type": "text", "text": "Searching..."}, {"type": "server_tool_use", "id": "s1"}],
+        ],
+    )
+    def test_matches_json_dumps_for_plain_ascii(self, obj: object) -> None:
+        assert _json_size(obj) == len(json.dumps(obj))
+
 
 class TestTruncateToBudget:
     def test_empty_messages(self) -> None:
@@ -4,18 +4,23 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
+from collections import deque
+from dataclasses import replace
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from unittest.mock import AsyncMock
 
 import pytest
 
+from chorus.agent.context import estimate_message_tokens
 from chorus.llm.providers import LLMResponse, ToolCall, Usage
 from chorus.llm.tool_loop import (
     ToolExecutionContext,
     ToolLoopEvent,
     ToolLoopEventType,
     ToolLoopResult,
+    _cap_tool_result,
     _is_error_result,
     _truncate_tool_loop_messages,
     _validate_tool_arguments,
@@ -24,10 +29,16 @@ from chorus.llm.tool_loop import (
 from chorus.permissions.engine import PermissionProfile
 from chorus.tools.registry import ToolDefinition, ToolRegistry
 
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+# Multiplier for real sleeps in timing tests; CI can set e.g. 0.1.
+_SLEEP_SCALE = float(os.getenv("CHORUS_TEST_SLEEP_SCALE", "1"))
+
 
 def _text_response(
     text: str = "Done.",
@@ -42,6 +53,16 @@ def _text_response(
     )
 
 
+# Shared tool calls; the tool loop copies arguments before injecting context.
+_TC_A = ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"})
+_TC_B = ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"})
+_EXPECTED_AB = frozenset({"tool_a", "tool_b"})
+
+# Shared read-only responses; the tool loop never mutates an LLMResponse.
+_DONE_RESPONSE = _text_response("Done.")
+_HI_RESPONSE = _text_response("Hi")
+
+
 def _tool_response(
     tool_calls: list[ToolCall],
     text: str | None = "Calling tools...",
@@ -60,9 +81,11 @@ class FakeProvider:
     """A fake LLM provider that returns scripted responses in order."""
 
     def __init__(self, responses: list[LLMResponse]) -> None:
-        self._responses = list(responses)
-        self._call_count = 0
+        self._responses = deque(responses)
         self.call_log: list[dict[str, Any]] = []
+        # Per-call snapshot of the messages grouped by role, so tests can
+        # read e.g. ``messages_by_role[1]["tool"]`` without filtering.
+        self.messages_by_role: list[dict[str, list[dict[str, Any]]]] = []
 
     @property
     def provider_name(self) -> str:
@@ -75,14 +98,73 @@ class FakeProvider:
         model: str | None = None,
     ) -> LLMResponse:
         self.call_log.append({"messages": messages, "tools": tools, "model": model})
-        if self._call_count >= len(self._responses):
+        by_role: dict[str, list[dict[str, Any]]] = {"user": [], "assistant": [], "tool": []}
+        for m in messages:
+            by_role.setdefault(m.get("role", ""), []).append(m)
+        self.messages_by_role.append(by_role)
+        if not self._responses:
             return _text_response("(ran out of scripted responses)")
-        resp = self._responses[self._call_count]
-        self._call_count += 1
-        return resp
+        return self._responses.popleft()
+
+
+class AssertingProvider(FakeProvider):
+    """A FakeProvider that checks a predicate against the messages of each call.
+
+    ``assertions[n]`` receives the messages passed to the n-th ``chat`` call
+    and must return True; calls beyond the predicate list are unchecked.
+    """
+
+    def __init__(
+        self,
+        responses: list[LLMResponse],
+        assertions: Sequence[Callable[[list[dict[str, Any]]], bool]] = (),
+    ) -> None:
+        super().__init__(responses)
+        self._assertions = list(assertions)
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+    ) -> LLMResponse:
+        n = len(self.call_log)
+        if n < len(self._assertions):
+            assert self._assertions[n](messages), f"Assertion for call {n + 1} failed"
+        return await super().chat(messages, tools=tools, model=model)
+
+
+def _user_contents(messages: list[dict[str, Any]]) -> list[str]:
+    return [m.get("content", "") for m in messages if m.get("role") == "user"]
+
+
+class _EventIndex:
+    """``on_event`` recorder that indexes events by type and iteration as they arrive."""
+
+    def __init__(self) -> None:
+        self.all: list[ToolLoopEvent] = []
+        self.by_type: dict[ToolLoopEventType, list[ToolLoopEvent]] = {}
+        self.by_iter: dict[int, list[ToolLoopEvent]] = {}
+
+    async def __call__(self, event: ToolLoopEvent) -> None:
+        self.all.append(event)
+        self.by_type.setdefault(event.type, []).append(event)
+        self.by_iter.setdefault(event.iteration, []).append(event)
 
 
-def _make_registry(*tool_defs: tuple[str, AsyncMock]) -> ToolRegistry:
+class _CountingHandler:
+    """Async tool handler stub that only counts calls; far cheaper than ``AsyncMock``."""
+
+    def __init__(self, result: Any) -> None:
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self, **_: Any) -> Any:
+        self.calls += 1
+        return self.result
+
+
+def _make_registry(*tool_defs: tuple[str, Callable[..., Awaitable[Any]]]) -> ToolRegistry:
     """Build a registry with simple tool definitions."""
     registry = ToolRegistry()
     for name, handler in tool_defs:
@@ -103,6 +185,10 @@ def _make_registry(*tool_defs: tuple[str, AsyncMock]) -> ToolRegistry:
     return registry
 
 
+# run_tool_loop only reads the registry, so tests without tools share one.
+_EMPTY_REGISTRY = _make_registry()
+
+
 def _open_profile() -> PermissionProfile:
     return PermissionProfile(allow=[".*"], ask=[])
 
@@ -115,16 +201,42 @@ def _ask_profile() -> PermissionProfile:
     return PermissionProfile(allow=[], ask=[".*"])
 
 
-def _make_ctx(tmp_path: Path) -> ToolExecutionContext:
-    workspace = tmp_path / "workspace"
-    workspace.mkdir(exist_ok=True)
+@pytest.fixture(scope="session")
+def _base_ctx_template() -> ToolExecutionContext:
+    """Shared context; per-test copies are cheap ``replace`` calls."""
     return ToolExecutionContext(
-        workspace=workspace,
+        workspace=Path(),
         profile=_open_profile(),
         agent_name="test-agent",
     )
 
 
+@pytest.fixture(scope="session")
+def _shared_ws(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    return tmp_path_factory.mktemp("shared")
+
+
+@pytest.fixture
+def shared_ctx(_base_ctx_template: ToolExecutionContext, _shared_ws: Path) -> ToolExecutionContext:
+    """A per-test context copy over one workspace for the whole run; no test here touches disk."""
+    return replace(_base_ctx_template, workspace=_shared_ws)
+
+
+@pytest.fixture(scope="module")
+def _ok_tool_module() -> tuple[ToolRegistry, _CountingHandler]:
+    handler = _CountingHandler({"ok": True})
+    return _make_registry(("my_tool", handler)), handler
+
+
+@pytest.fixture
+def ok_tool(
+    _ok_tool_module: tuple[ToolRegistry, _CountingHandler],
+) -> tuple[ToolRegistry, _CountingHandler]:
+    """Module-wide ``my_tool`` registry returning ``{"ok": True}``; the count resets per test."""
+    _ok_tool_module[1].calls = 0
+    return _ok_tool_module
+
+
 # ---------------------------------------------------------------------------
 # Core loop
 # ---------------------------------------------------------------------------
@@ -132,17 +244,18 @@ def _make_ctx(tmp_path: Path) -> ToolExecutionContext:
 
 class TestToolLoopCore:
     @pytest.mark.asyncio
-    async def test_returns_text_response_immediately(self, tmp_path: Path) -> None:
+    async def test_returns_text_response_immediately(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
         """No tool calls → returns immediately."""
         provider = FakeProvider([_text_response("Hello!")])
-        ctx = _make_ctx(tmp_path)
-        registry = _make_registry()
+        registry = _EMPTY_REGISTRY
 
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Hi"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="You are helpful.",
             model="claude-sonnet-4-20250514",
         )
@@ -153,7 +266,7 @@ class TestToolLoopCore:
         assert result.tool_calls_made == 0
 
     @pytest.mark.asyncio
-    async def test_executes_single_tool_call(self, tmp_path: Path) -> None:
+    async def test_executes_single_tool_call(self, shared_ctx: ToolExecutionContext) -> None:
         handler = AsyncMock(return_value={"result": "file created"})
         registry = _make_registry(("create_file", handler))
 
@@ -166,12 +279,11 @@ class TestToolLoopCore:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Create a file"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="claude-sonnet-4-20250514",
         )
@@ -182,29 +294,25 @@ class TestToolLoopCore:
         handler.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_executes_multiple_tool_calls_in_sequence(self, tmp_path: Path) -> None:
+    async def test_executes_multiple_tool_calls_in_sequence(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
         h1 = AsyncMock(return_value={"result": "done 1"})
         h2 = AsyncMock(return_value={"result": "done 2"})
         registry = _make_registry(("tool_a", h1), ("tool_b", h2))
 
         provider = FakeProvider(
             [
-                _tool_response(
-                    [
-                        ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"}),
-                        ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"}),
-                    ]
-                ),
+                _tool_response([_TC_A, _TC_B]),
                 _text_response("Both done."),
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do both"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="claude-sonnet-4-20250514",
         )
@@ -215,7 +323,7 @@ class TestToolLoopCore:
         h2.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_feeds_tool_result_back_to_llm(self, tmp_path: Path) -> None:
+    async def test_feeds_tool_result_back_to_llm(self, shared_ctx: ToolExecutionContext) -> None:
         handler = AsyncMock(return_value={"output": "42"})
         registry = _make_registry(("compute", handler))
 
@@ -226,24 +334,22 @@ class TestToolLoopCore:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Compute 6*7"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="claude-sonnet-4-20250514",
         )
 
         # The second call should include the tool result message
-        second_call_msgs = provider.call_log[1]["messages"]
-        tool_result_msgs = [m for m in second_call_msgs if m.get("role") == "tool"]
+        tool_result_msgs = provider.messages_by_role[1]["tool"]
         assert len(tool_result_msgs) == 1
         assert "42" in tool_result_msgs[0]["content"]
 
     @pytest.mark.asyncio
-    async def test_multi_turn_tool_conversation(self, tmp_path: Path) -> None:
+    async def test_multi_turn_tool_conversation(self, shared_ctx: ToolExecutionContext) -> None:
         handler = AsyncMock(side_effect=[{"step": "1"}, {"step": "2"}])
         registry = _make_registry(("step_tool", handler))
 
@@ -255,12 +361,11 @@ class TestToolLoopCore:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Run steps"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="claude-sonnet-4-20250514",
         )
@@ -270,7 +375,9 @@ class TestToolLoopCore:
         assert result.tool_calls_made == 2
 
     @pytest.mark.asyncio
-    async def test_max_iterations_stops_infinite_loop(self, tmp_path: Path) -> None:
+    async def test_max_iterations_stops_infinite_loop(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
         handler = AsyncMock(return_value={"ok": True})
         registry = _make_registry(("looper", handler))
 
@@ -281,12 +388,11 @@ class TestToolLoopCore:
         ]
         provider = FakeProvider(responses)
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Loop forever"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="claude-sonnet-4-20250514",
             max_iterations=3,
@@ -303,36 +409,37 @@ class TestToolLoopCore:
 
 class TestToolLoopPermissions:
     @pytest.mark.asyncio
-    async def test_allowed_tool_executes_automatically(self, tmp_path: Path) -> None:
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+    async def test_allowed_tool_executes_automatically(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
+        registry, handler = ok_tool
 
         provider = FakeProvider(
             [
                 _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _open_profile()
+        shared_ctx.profile = _open_profile()
 
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
-        handler.assert_called_once()
+        assert handler.calls == 1
         assert result.content == "Done."
 
     @pytest.mark.asyncio
-    async def test_denied_tool_returns_error(self, tmp_path: Path) -> None:
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+    async def test_denied_tool_returns_error(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
+        registry, handler = ok_tool
 
         provider = FakeProvider(
             [
@@ -341,28 +448,27 @@ class TestToolLoopPermissions:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _deny_profile()
+        shared_ctx.profile = _deny_profile()
 
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
-        handler.assert_not_called()
+        assert handler.calls == 0
         # The error should have been fed back to the LLM
-        second_call_msgs = provider.call_log[1]["messages"]
-        tool_results = [m for m in second_call_msgs if m.get("role") == "tool"]
+        tool_results = provider.messages_by_role[1]["tool"]
         assert any("denied" in (m.get("content", "")).lower() for m in tool_results)
 
     @pytest.mark.asyncio
-    async def test_ask_tool_prompts_callback_and_approved(self, tmp_path: Path) -> None:
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+    async def test_ask_tool_prompts_callback_and_approved(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
+        registry, handler = ok_tool
 
         provider = FakeProvider(
             [
@@ -371,8 +477,7 @@ class TestToolLoopPermissions:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _ask_profile()
+        shared_ctx.profile = _ask_profile()
 
         ask_callback = AsyncMock(return_value=True)
 
@@ -380,20 +485,21 @@ class TestToolLoopPermissions:
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             ask_callback=ask_callback,
         )
 
         ask_callback.assert_called_once()
-        handler.assert_called_once()
+        assert handler.calls == 1
         assert result.content == "Approved and done."
 
     @pytest.mark.asyncio
-    async def test_ask_tool_prompts_callback_and_rejected(self, tmp_path: Path) -> None:
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+    async def test_ask_tool_prompts_callback_and_rejected(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
+        registry, handler = ok_tool
 
         provider = FakeProvider(
             [
@@ -402,8 +508,7 @@ class TestToolLoopPermissions:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _ask_profile()
+        shared_ctx.profile = _ask_profile()
 
         ask_callback = AsyncMock(return_value=False)
 
@@ -411,19 +516,20 @@ class TestToolLoopPermissions:
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             ask_callback=ask_callback,
         )
 
         ask_callback.assert_called_once()
-        handler.assert_not_called()
+        assert handler.calls == 0
 
     @pytest.mark.asyncio
-    async def test_ask_tool_no_callback_defaults_to_deny(self, tmp_path: Path) -> None:
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+    async def test_ask_tool_no_callback_defaults_to_deny(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
+        registry, handler = ok_tool
 
         provider = FakeProvider(
             [
@@ -432,20 +538,19 @@ class TestToolLoopPermissions:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _ask_profile()
+        shared_ctx.profile = _ask_profile()
 
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             ask_callback=None,
         )
 
-        handler.assert_not_called()
+        assert handler.calls == 0
 
 
 # ---------------------------------------------------------------------------
@@ -455,7 +560,7 @@ class TestToolLoopPermissions:
 
 class TestToolLoopErrors:
     @pytest.mark.asyncio
-    async def test_tool_execution_error_fed_back(self, tmp_path: Path) -> None:
+    async def test_tool_execution_error_fed_back(self, shared_ctx: ToolExecutionContext) -> None:
         handler = AsyncMock(side_effect=RuntimeError("disk full"))
         registry = _make_registry(("failing_tool", handler))
 
@@ -466,24 +571,22 @@ class TestToolLoopErrors:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
         # Error should have been sent back to the LLM
-        second_call_msgs = provider.call_log[1]["messages"]
-        tool_results = [m for m in second_call_msgs if m.get("role") == "tool"]
+        tool_results = provider.messages_by_role[1]["tool"]
         assert any("disk full" in (m.get("content", "")).lower() for m in tool_results)
 
     @pytest.mark.asyncio
-    async def test_unknown_tool_returns_error(self, tmp_path: Path) -> None:
-        registry = _make_registry()  # empty registry
+    async def test_unknown_tool_returns_error(self, shared_ctx: ToolExecutionContext) -> None:
+        registry = _EMPTY_REGISTRY
 
         provider = FakeProvider(
             [
@@ -492,23 +595,21 @@ class TestToolLoopErrors:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
         # Error message should mention the unknown tool
-        second_call_msgs = provider.call_log[1]["messages"]
-        tool_results = [m for m in second_call_msgs if m.get("role") == "tool"]
+        tool_results = provider.messages_by_role[1]["tool"]
         assert any("unknown tool" in (m.get("content", "")).lower() for m in tool_results)
 
     @pytest.mark.asyncio
-    async def test_llm_api_error_raised(self, tmp_path: Path) -> None:
+    async def test_llm_api_error_raised(self, shared_ctx: ToolExecutionContext) -> None:
         """Errors from the LLM API should propagate up."""
 
         class ErrorProvider:
@@ -524,13 +625,12 @@ class TestToolLoopErrors:
             ) -> LLMResponse:
                 raise ConnectionError("API unreachable")
 
-        ctx = _make_ctx(tmp_path)
         with pytest.raises(ConnectionError, match="API unreachable"):
             await run_tool_loop(
                 provider=ErrorProvider(),
                 messages=[{"role": "user", "content": "Hi"}],
-                tools=_make_registry(),
-                ctx=ctx,
+                tools=_EMPTY_REGISTRY,
+                ctx=shared_ctx,
                 system_prompt="",
                 model="test",
             )
@@ -543,23 +643,23 @@ class TestToolLoopErrors:
 
 class TestToolLoopUsage:
     @pytest.mark.asyncio
-    async def test_tracks_total_token_usage(self, tmp_path: Path) -> None:
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+    async def test_tracks_total_token_usage(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
+        registry, _ = ok_tool
 
         provider = FakeProvider(
             [
                 _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -569,18 +669,21 @@ class TestToolLoopUsage:
         assert result.total_usage.output_tokens == 20
 
     @pytest.mark.asyncio
-    async def test_usage_addition_with_cache_fields(self, tmp_path: Path) -> None:
+    async def test_usage_addition_with_cache_fields(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """Usage.__add__ accumulates cache fields across iterations."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, _ = ok_tool
 
         r1 = LLMResponse(
             content="Calling tools...",
             tool_calls=[ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})],
             stop_reason="tool_use",
             usage=Usage(
-                input_tokens=20, output_tokens=15,
-                cache_creation_input_tokens=100, cache_read_input_tokens=0,
+                input_tokens=20,
+                output_tokens=15,
+                cache_creation_input_tokens=100,
+                cache_read_input_tokens=0,
             ),
             model="claude-sonnet-4-20250514",
         )
@@ -589,19 +692,20 @@ class TestToolLoopUsage:
             tool_calls=[],
             stop_reason="end_turn",
             usage=Usage(
-                input_tokens=10, output_tokens=5,
-                cache_creation_input_tokens=0, cache_read_input_tokens=100,
+                input_tokens=10,
+                output_tokens=5,
+                cache_creation_input_tokens=0,
+                cache_read_input_tokens=100,
             ),
             model="claude-sonnet-4-20250514",
         )
         provider = FakeProvider([r1, r2])
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -610,15 +714,14 @@ class TestToolLoopUsage:
         assert result.total_usage.cache_read_input_tokens == 100
 
     @pytest.mark.asyncio
-    async def test_usage_on_single_turn(self, tmp_path: Path) -> None:
-        provider = FakeProvider([_text_response("Hi")])
-        ctx = _make_ctx(tmp_path)
+    async def test_usage_on_single_turn(self, shared_ctx: ToolExecutionContext) -> None:
+        provider = FakeProvider([_HI_RESPONSE])
 
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Hi"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -639,50 +742,35 @@ class TestToolLoopUsage:
 
 class TestToolLoopInjection:
     @pytest.mark.asyncio
-    async def test_injected_message_appears_in_context(self, tmp_path: Path) -> None:
+    async def test_injected_message_appears_in_context(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """A message queued in inject_queue appears in the next LLM call."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, _ = ok_tool
 
         inject_queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
 
         # Provider: first call returns tool use, second call returns text.
-        # We inject a message before the second call.
-        call_count = 0
-
-        class InjectingProvider:
-            @property
-            def provider_name(self) -> str:
-                return "fake"
-
-            async def chat(
-                self,
-                messages: list[dict[str, Any]],
-                tools: list[dict[str, Any]] | None = None,
-                model: str | None = None,
-            ) -> LLMResponse:
-                nonlocal call_count
-                call_count += 1
-                if call_count == 1:
-                    return _tool_response(
-                        [ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]
-                    )
-                # On second call, check that the injected message is present
-                user_msgs = [m for m in messages if m.get("role") == "user"]
-                assert any("interjected" in m.get("content", "") for m in user_msgs), (
-                    "Injected message not found in messages"
-                )
-                return _text_response("Done with injection.")
+        # The injected message must be present on the second call.
+        provider = AssertingProvider(
+            [
+                _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
+                _text_response("Done with injection."),
+            ],
+            assertions=[
+                lambda m: True,
+                lambda m: any("interjected" in c for c in _user_contents(m)),
+            ],
+        )
 
         # Queue the message before the loop starts — it'll be drained on iteration 2
         inject_queue.put_nowait({"role": "user", "content": "interjected message"})
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
-            provider=InjectingProvider(),
+            provider=provider,
             messages=[{"role": "user", "content": "initial"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             inject_queue=inject_queue,
@@ -690,16 +778,15 @@ class TestToolLoopInjection:
         assert result.content == "Done with injection."
 
     @pytest.mark.asyncio
-    async def test_no_injection_when_queue_is_none(self, tmp_path: Path) -> None:
+    async def test_no_injection_when_queue_is_none(self, shared_ctx: ToolExecutionContext) -> None:
         """inject_queue=None works fine (backward compat)."""
-        provider = FakeProvider([_text_response("Hi")])
-        ctx = _make_ctx(tmp_path)
+        provider = FakeProvider([_HI_RESPONSE])
 
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Hi"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             inject_queue=None,
@@ -707,17 +794,16 @@ class TestToolLoopInjection:
         assert result.content == "Hi"
 
     @pytest.mark.asyncio
-    async def test_no_injection_when_queue_empty(self, tmp_path: Path) -> None:
+    async def test_no_injection_when_queue_empty(self, shared_ctx: ToolExecutionContext) -> None:
         """Empty queue doesn't alter messages."""
         inject_queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
         provider = FakeProvider([_text_response("Normal")])
-        ctx = _make_ctx(tmp_path)
 
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Hi"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             inject_queue=inject_queue,
@@ -729,45 +815,33 @@ class TestToolLoopInjection:
         assert len(user_msgs) == 1
 
     @pytest.mark.asyncio
-    async def test_multiple_injected_messages_in_order(self, tmp_path: Path) -> None:
+    async def test_multiple_injected_messages_in_order(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """3 queued messages appear in FIFO order."""
         inject_queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
         inject_queue.put_nowait({"role": "user", "content": "first"})
         inject_queue.put_nowait({"role": "user", "content": "second"})
         inject_queue.put_nowait({"role": "user", "content": "third"})
 
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, _ = ok_tool
 
-        class CheckingProvider:
-            @property
-            def provider_name(self) -> str:
-                return "fake"
+        def _injected_in_order(messages: list[dict[str, Any]]) -> bool:
+            # Should have: "initial", "first", "second", "third"
+            contents = _user_contents(messages)
+            if not {"first", "second", "third"} <= set(contents):
+                return False
+            return contents.index("first") < contents.index("second") < contents.index("third")
+
+        provider = AssertingProvider(
+            [_text_response("All injected.")], assertions=[_injected_in_order]
+        )
 
-            async def chat(
-                self,
-                messages: list[dict[str, Any]],
-                tools: list[dict[str, Any]] | None = None,
-                model: str | None = None,
-            ) -> LLMResponse:
-                # All three injected messages should appear in order
-                user_contents = [m["content"] for m in messages if m.get("role") == "user"]
-                # Should have: "initial", "first", "second", "third"
-                assert "first" in user_contents
-                assert "second" in user_contents
-                assert "third" in user_contents
-                idx_first = user_contents.index("first")
-                idx_second = user_contents.index("second")
-                idx_third = user_contents.index("third")
-                assert idx_first < idx_second < idx_third
-                return _text_response("All injected.")
-
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
-            provider=CheckingProvider(),
+            provider=provider,
             messages=[{"role": "user", "content": "initial"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             inject_queue=inject_queue,
@@ -782,8 +856,8 @@ class TestToolLoopInjection:
 
 class TestToolContextInjection:
     @pytest.mark.asyncio
-    async def test_workspace_injected_into_tool(self, tmp_path: Path) -> None:
-        """Tools that accept workspace should get it injected from ctx."""
+    async def test_workspace_injected_into_tool(self, shared_ctx: ToolExecutionContext) -> None:
+        """Tools that accept workspace should get it injected from shared_ctx."""
         received: dict[str, Any] = {}
 
         async def fake_create_file(workspace: Path, path: str, content: str) -> dict[str, Any]:
@@ -820,16 +894,15 @@ class TestToolContextInjection:
                         )
                     ]
                 ),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Create file"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -848,13 +921,14 @@ class TestToolContextInjection:
 
 class TestScopePathContext:
     def test_scope_path_in_context_injected_params(self) -> None:
-        from chorus.llm.tool_loop import _CONTEXT_INJECTED_PARAMS
+        from chorus.tools.registry import CONTEXT_INJECTED_PARAMS
 
-        assert "scope_path" in _CONTEXT_INJECTED_PARAMS
+        assert "scope_path" in CONTEXT_INJECTED_PARAMS
 
-    def test_tool_execution_context_default_scope_path_is_none(self, tmp_path: Path) -> None:
-        ctx = _make_ctx(tmp_path)
-        assert ctx.scope_path is None
+    def test_tool_execution_context_default_scope_path_is_none(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
+        assert shared_ctx.scope_path is None
 
     def test_tool_execution_context_accepts_scope_path(self, tmp_path: Path) -> None:
         workspace = tmp_path / "workspace"
@@ -874,117 +948,132 @@ class TestScopePathContext:
 # ---------------------------------------------------------------------------
 
 
+_TEXT_ONLY_EVENT_ORDER = (
+    ToolLoopEventType.LLM_CALL_START,
+    ToolLoopEventType.LLM_CALL_COMPLETE,
+    ToolLoopEventType.LOOP_COMPLETE,
+)
+_ONE_TOOL_EVENT_ORDER = (
+    ToolLoopEventType.LLM_CALL_START,
+    ToolLoopEventType.LLM_CALL_COMPLETE,
+    ToolLoopEventType.TOOL_CALL_START,
+    ToolLoopEventType.TOOL_CALL_COMPLETE,
+    *_TEXT_ONLY_EVENT_ORDER,
+)
+
+
+async def _raising_on_event(event: ToolLoopEvent) -> None:
+    raise RuntimeError("callback boom")
+
+
+_ON_EVENT_FACTORIES: dict[str, Callable[[], Callable[[ToolLoopEvent], Awaitable[None]] | None]] = {
+    "none": lambda: None,
+    "raising": lambda: _raising_on_event,
+    "recording": _EventIndex,
+}
+
+
 class TestToolLoopOnEvent:
     @pytest.mark.asyncio
-    async def test_on_event_fires_for_simple_tool_scenario(self, tmp_path: Path) -> None:
+    async def test_on_event_fires_for_simple_tool_scenario(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """Recording callback captures expected event sequence."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, _ = ok_tool
 
         provider = FakeProvider(
             [
                 _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        events: list[ToolLoopEvent] = []
+        events = _EventIndex()
 
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
-
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=recorder,
-        )
-
-        types = [e.type for e in events]
-        assert types == [
-            ToolLoopEventType.LLM_CALL_START,
-            ToolLoopEventType.LLM_CALL_COMPLETE,
-            ToolLoopEventType.TOOL_CALL_START,
-            ToolLoopEventType.TOOL_CALL_COMPLETE,
-            ToolLoopEventType.LLM_CALL_START,
-            ToolLoopEventType.LLM_CALL_COMPLETE,
-            ToolLoopEventType.LOOP_COMPLETE,
-        ]
-
-    @pytest.mark.asyncio
-    async def test_on_event_error_logged_not_raised(self, tmp_path: Path) -> None:
-        """If the callback raises, the loop still completes."""
+            on_event=events,
+        )
 
-        async def bad_callback(event: ToolLoopEvent) -> None:
-            raise RuntimeError("callback boom")
+        assert tuple(e.type for e in events.all) == _ONE_TOOL_EVENT_ORDER
 
-        provider = FakeProvider([_text_response("Hi")])
-        ctx = _make_ctx(tmp_path)
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("cb_kind", sorted(_ON_EVENT_FACTORIES))
+    async def test_on_event_callback_contract(
+        self, shared_ctx: ToolExecutionContext, cb_kind: str
+    ) -> None:
+        """No callback, a raising callback and a recording one all let the loop finish."""
+        on_event = _ON_EVENT_FACTORIES[cb_kind]()
 
         result = await run_tool_loop(
-            provider=provider,
+            provider=FakeProvider([_HI_RESPONSE]),
             messages=[{"role": "user", "content": "Hi"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=bad_callback,
+            on_event=on_event,
         )
 
         assert result.content == "Hi"
+        if isinstance(on_event, _EventIndex):
+            assert tuple(e.type for e in on_event.all) == _TEXT_ONLY_EVENT_ORDER
 
     @pytest.mark.asyncio
-    async def test_on_event_none_backward_compat(self, tmp_path: Path) -> None:
-        """on_event=None works fine (backward compat)."""
-        provider = FakeProvider([_text_response("Hi")])
-        ctx = _make_ctx(tmp_path)
+    async def test_no_events_built_without_callback(
+        self, shared_ctx: ToolExecutionContext, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """With on_event=None the loop never constructs a ToolLoopEvent."""
+
+        def _no_events(**kwargs: Any) -> ToolLoopEvent:
+            raise AssertionError("ToolLoopEvent built with no on_event callback")
+
+        monkeypatch.setattr("chorus.llm.tool_loop.ToolLoopEvent", _no_events)
+        handler = AsyncMock(return_value={"ok": True})
 
         result = await run_tool_loop(
-            provider=provider,
-            messages=[{"role": "user", "content": "Hi"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            provider=FakeProvider([_tool_response([_TC_A, _TC_B]), _DONE_RESPONSE]),
+            messages=[{"role": "user", "content": "Do both"}],
+            tools=_make_registry(("tool_a", handler), ("tool_b", handler)),
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=None,
         )
 
-        assert result.content == "Hi"
+        assert result.content == "Done."
 
     @pytest.mark.asyncio
-    async def test_on_event_usage_delta_correct(self, tmp_path: Path) -> None:
+    async def test_on_event_usage_delta_correct(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """LLM_CALL_COMPLETE carries per-call usage delta."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, _ = ok_tool
 
         provider = FakeProvider(
             [
                 _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        events: list[ToolLoopEvent] = []
+        events = _EventIndex()
 
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
-
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=recorder,
+            on_event=events,
         )
 
-        complete_events = [e for e in events if e.type == ToolLoopEventType.LLM_CALL_COMPLETE]
+        complete_events = events.by_type.get(ToolLoopEventType.LLM_CALL_COMPLETE, [])
         assert len(complete_events) == 2
         # First call: _tool_response uses 20 in / 15 out
         assert complete_events[0].usage_delta is not None
@@ -1000,43 +1089,40 @@ class TestToolLoopOnEvent:
         assert complete_events[1].total_usage.output_tokens == 20
 
     @pytest.mark.asyncio
-    async def test_on_event_iteration_count(self, tmp_path: Path) -> None:
+    async def test_on_event_iteration_count(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """Events carry the correct iteration number."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, _ = ok_tool
 
         provider = FakeProvider(
             [
                 _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        events: list[ToolLoopEvent] = []
+        events = _EventIndex()
 
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
-
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=recorder,
+            on_event=events,
         )
 
         # First iteration events
-        iter1_events = [e for e in events if e.iteration == 1]
+        iter1_events = events.by_iter.get(1, [])
         assert len(iter1_events) == 4  # LLM_START, LLM_COMPLETE, TOOL_START, TOOL_COMPLETE
         # Second iteration events
-        iter2_events = [e for e in events if e.iteration == 2]
+        iter2_events = events.by_iter.get(2, [])
         assert len(iter2_events) == 3  # LLM_START, LLM_COMPLETE, LOOP_COMPLETE
 
     @pytest.mark.asyncio
-    async def test_on_event_tools_used_accumulates(self, tmp_path: Path) -> None:
+    async def test_on_event_tools_used_accumulates(self, shared_ctx: ToolExecutionContext) -> None:
         """Two different tools → both appear in tools_used."""
         h1 = AsyncMock(return_value={"ok": True})
         h2 = AsyncMock(return_value={"ok": True})
@@ -1044,66 +1130,54 @@ class TestToolLoopOnEvent:
 
         provider = FakeProvider(
             [
-                _tool_response(
-                    [
-                        ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"}),
-                        ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"}),
-                    ]
-                ),
-                _text_response("Done."),
+                _tool_response([_TC_A, _TC_B]),
+                _DONE_RESPONSE,
             ]
         )
 
-        events: list[ToolLoopEvent] = []
-
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
+        events = _EventIndex()
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do both"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=recorder,
+            on_event=events,
         )
 
-        loop_complete = [e for e in events if e.type == ToolLoopEventType.LOOP_COMPLETE]
+        loop_complete = events.by_type.get(ToolLoopEventType.LOOP_COMPLETE, [])
         assert len(loop_complete) == 1
-        assert set(loop_complete[0].tools_used) == {"tool_a", "tool_b"}
+        assert frozenset(loop_complete[0].tools_used) == _EXPECTED_AB
 
     @pytest.mark.asyncio
-    async def test_on_event_tool_call_start_has_name(self, tmp_path: Path) -> None:
+    async def test_on_event_tool_call_start_has_name(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """TOOL_CALL_START event carries the tool_name."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, _ = ok_tool
 
         provider = FakeProvider(
             [
                 _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        events: list[ToolLoopEvent] = []
-
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
+        events = _EventIndex()
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=recorder,
+            on_event=events,
         )
 
-        start_events = [e for e in events if e.type == ToolLoopEventType.TOOL_CALL_START]
+        start_events = events.by_type.get(ToolLoopEventType.TOOL_CALL_START, [])
         assert len(start_events) == 1
         assert start_events[0].tool_name == "my_tool"
 
@@ -1115,80 +1189,77 @@ class TestToolLoopOnEvent:
 
 class TestParallelToolExecution:
     @pytest.mark.asyncio
-    async def test_parallel_reduces_wall_time(self, tmp_path: Path) -> None:
-        """Two slow tools run in parallel should take ~1x, not ~2x the time."""
+    async def test_parallel_tools_overlap(self, shared_ctx: ToolExecutionContext) -> None:
+        """Parallel tools overlap — neither can finish until the other starts.
 
-        async def slow_tool(arg: str) -> dict[str, Any]:
-            await asyncio.sleep(0.3)
+        Each handler waits on a two-party barrier.  Sequential execution
+        would deadlock on the first handler, which the timeout turns into
+        a failure instead of a hang.
+        """
+        barrier = asyncio.Barrier(2)
+
+        async def rendezvous_tool(arg: str) -> dict[str, Any]:
+            await barrier.wait()
             return {"result": arg}
 
-        h1 = AsyncMock(side_effect=slow_tool)
-        h2 = AsyncMock(side_effect=slow_tool)
-        registry = _make_registry(("tool_a", h1), ("tool_b", h2))
+        registry = _make_registry(("tool_a", rendezvous_tool), ("tool_b", rendezvous_tool))
 
         provider = FakeProvider(
             [
-                _tool_response(
-                    [
-                        ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"}),
-                        ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"}),
-                    ]
-                ),
+                _tool_response([_TC_A, _TC_B]),
                 _text_response("Both done."),
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
-        import time
-        start = time.monotonic()
-        result = await run_tool_loop(
-            provider=provider,
-            messages=[{"role": "user", "content": "Do both"}],
-            tools=registry,
-            ctx=ctx,
-            system_prompt="",
-            model="test",
-        )
-        elapsed = time.monotonic() - start
+        try:
+            result = await asyncio.wait_for(
+                run_tool_loop(
+                    provider=provider,
+                    messages=[{"role": "user", "content": "Do both"}],
+                    tools=registry,
+                    ctx=shared_ctx,
+                    system_prompt="",
+                    model="test",
+                ),
+                timeout=1.0,
+            )
+        except TimeoutError:
+            pytest.fail("Expected parallel execution, but tools ran sequentially")
 
         assert result.content == "Both done."
         assert result.tool_calls_made == 2
-        # If run in parallel, should take ~0.3s; sequential would be ~0.6s
-        assert elapsed < 0.55, f"Expected parallel execution, but took {elapsed:.2f}s"
 
     @pytest.mark.asyncio
-    async def test_ask_permission_forces_sequential(self, tmp_path: Path) -> None:
+    async def test_ask_permission_forces_sequential(self, shared_ctx: ToolExecutionContext) -> None:
         """Tools with ASK permission fall back to sequential execution."""
-
-        async def slow_tool(arg: str) -> dict[str, Any]:
-            await asyncio.sleep(0.1)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def tracking_tool(arg: str) -> dict[str, Any]:
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0)  # give a parallel sibling the chance to start
+            in_flight -= 1
             return {"result": arg}
 
-        h1 = AsyncMock(side_effect=slow_tool)
-        h2 = AsyncMock(side_effect=slow_tool)
-        registry = _make_registry(("tool_a", h1), ("tool_b", h2))
+        registry = _make_registry(("tool_a", tracking_tool), ("tool_b", tracking_tool))
 
         provider = FakeProvider(
             [
-                _tool_response(
-                    [
-                        ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"}),
-                        ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"}),
-                    ]
-                ),
+                _tool_response([_TC_A, _TC_B]),
                 _text_response("Both done."),
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _ask_profile()
+        shared_ctx.profile = _ask_profile()
         ask_callback = AsyncMock(return_value=True)
 
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do both"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             ask_callback=ask_callback,
@@ -1196,50 +1267,42 @@ class TestParallelToolExecution:
 
         assert result.content == "Both done."
         assert result.tool_calls_made == 2
+        assert max_in_flight == 1
         # Should have asked for each tool
         assert ask_callback.call_count == 2
 
     @pytest.mark.asyncio
-    async def test_results_appended_in_order(self, tmp_path: Path) -> None:
+    async def test_results_appended_in_order(self, shared_ctx: ToolExecutionContext) -> None:
         """Tool results must be in the same order as tool_calls, even with parallel."""
 
         async def tool_a_handler(arg: str) -> dict[str, Any]:
-            await asyncio.sleep(0.2)  # tool_a is slower
+            await asyncio.sleep(0.2 * _SLEEP_SCALE)  # tool_a is slower
             return {"result": "from_a"}
 
         async def tool_b_handler(arg: str) -> dict[str, Any]:
-            await asyncio.sleep(0.01)  # tool_b is faster
+            await asyncio.sleep(0.01 * _SLEEP_SCALE)  # tool_b is faster
             return {"result": "from_b"}
 
-        h1 = AsyncMock(side_effect=tool_a_handler)
-        h2 = AsyncMock(side_effect=tool_b_handler)
-        registry = _make_registry(("tool_a", h1), ("tool_b", h2))
+        registry = _make_registry(("tool_a", tool_a_handler), ("tool_b", tool_b_handler))
 
         provider = FakeProvider(
             [
-                _tool_response(
-                    [
-                        ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"}),
-                        ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"}),
-                    ]
-                ),
-                _text_response("Done."),
+                _tool_response([_TC_A, _TC_B]),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do both"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
         # Check that tool results appear in original call order
-        second_call_msgs = provider.call_log[1]["messages"]
-        tool_results = [m for m in second_call_msgs if m.get("role") == "tool"]
+        tool_results = provider.messages_by_role[1]["tool"]
         assert len(tool_results) == 2
         assert tool_results[0]["tool_call_id"] == "tc_1"
         assert tool_results[1]["tool_call_id"] == "tc_2"
@@ -1247,38 +1310,30 @@ class TestParallelToolExecution:
         assert "from_b" in tool_results[1]["content"]
 
     @pytest.mark.asyncio
-    async def test_one_failure_doesnt_cancel_others(self, tmp_path: Path) -> None:
-        """return_exceptions=True ensures one failure doesn't kill the batch."""
+    async def test_one_failure_doesnt_cancel_others(self, shared_ctx: ToolExecutionContext) -> None:
+        """One failing tool doesn't cancel the rest of the batch."""
 
         async def fail_tool(arg: str) -> dict[str, Any]:
             raise RuntimeError("tool_a exploded")
 
         async def ok_tool(arg: str) -> dict[str, Any]:
-            await asyncio.sleep(0.05)
+            await asyncio.sleep(0)
             return {"result": "ok"}
 
-        h1 = AsyncMock(side_effect=fail_tool)
-        h2 = AsyncMock(side_effect=ok_tool)
-        registry = _make_registry(("tool_a", h1), ("tool_b", h2))
+        registry = _make_registry(("tool_a", fail_tool), ("tool_b", ok_tool))
 
         provider = FakeProvider(
             [
-                _tool_response(
-                    [
-                        ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"}),
-                        ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"}),
-                    ]
-                ),
+                _tool_response([_TC_A, _TC_B]),
                 _text_response("Handled errors."),
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do both"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -1287,8 +1342,7 @@ class TestParallelToolExecution:
         assert result.tool_calls_made == 2
 
         # Both results should be in the second call
-        second_call_msgs = provider.call_log[1]["messages"]
-        tool_results = [m for m in second_call_msgs if m.get("role") == "tool"]
+        tool_results = provider.messages_by_role[1]["tool"]
         assert len(tool_results) == 2
         # First result should contain the error
         assert "error" in tool_results[0]["content"].lower()
@@ -1296,7 +1350,79 @@ class TestParallelToolExecution:
         assert "ok" in tool_results[1]["content"]
 
     @pytest.mark.asyncio
-    async def test_events_fire_for_each_parallel_tool(self, tmp_path: Path) -> None:
+    async def test_handler_raised_cancelled_error_is_per_tool(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
+        """A handler raising CancelledError itself fails only that tool."""
+
+        async def self_cancelling_tool(arg: str) -> dict[str, Any]:
+            raise asyncio.CancelledError
+
+        async def ok_tool(arg: str) -> dict[str, Any]:
+            return {"result": "ok"}
+
+        registry = _make_registry(("tool_a", self_cancelling_tool), ("tool_b", ok_tool))
+        provider = FakeProvider([_tool_response([_TC_A, _TC_B]), _DONE_RESPONSE])
+
+        result = await run_tool_loop(
+            provider=provider,
+            messages=[{"role": "user", "content": "Do both"}],
+            tools=registry,
+            ctx=shared_ctx,
+            system_prompt="",
+            model="test",
+        )
+
+        assert result.iterations == 2
+        tool_results = provider.messages_by_role[1]["tool"]
+        assert "CancelledError" in tool_results[0]["content"]
+        assert "ok" in tool_results[1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_outer_cancel_cancels_tools(self, shared_ctx: ToolExecutionContext) -> None:
+        """Cancelling the loop cancels every in-flight parallel tool."""
+        started = asyncio.Barrier(3)
+        cancelled: list[str] = []
+
+        async def hanging_tool(arg: str) -> dict[str, Any]:
+            await started.wait()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(arg)
+                raise
+            return {"result": arg}
+
+        registry = _make_registry(("tool_a", hanging_tool), ("tool_b", hanging_tool))
+
+        provider = FakeProvider(
+            [
+                _tool_response([_TC_A, _TC_B]),
+                _DONE_RESPONSE,
+            ]
+        )
+
+        task = asyncio.create_task(
+            run_tool_loop(
+                provider=provider,
+                messages=[{"role": "user", "content": "Do both"}],
+                tools=registry,
+                ctx=shared_ctx,
+                system_prompt="",
+                model="test",
+            )
+        )
+        await asyncio.wait_for(started.wait(), timeout=1.0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert sorted(cancelled) == ["x", "y"]
+
+    @pytest.mark.asyncio
+    async def test_events_fire_for_each_parallel_tool(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
         """TOOL_CALL_START and TOOL_CALL_COMPLETE fire for each tool in parallel."""
         h1 = AsyncMock(return_value={"ok": True})
         h2 = AsyncMock(return_value={"ok": True})
@@ -1304,155 +1430,175 @@ class TestParallelToolExecution:
 
         provider = FakeProvider(
             [
-                _tool_response(
-                    [
-                        ToolCall(id="tc_1", name="tool_a", arguments={"arg": "x"}),
-                        ToolCall(id="tc_2", name="tool_b", arguments={"arg": "y"}),
-                    ]
-                ),
-                _text_response("Done."),
+                _tool_response([_TC_A, _TC_B]),
+                _DONE_RESPONSE,
             ]
         )
 
-        events: list[ToolLoopEvent] = []
+        events = _EventIndex()
 
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
-
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do both"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            on_event=recorder,
+            on_event=events,
         )
 
         # Should have START and COMPLETE for each tool
-        start_events = [e for e in events if e.type == ToolLoopEventType.TOOL_CALL_START]
-        complete_events = [e for e in events if e.type == ToolLoopEventType.TOOL_CALL_COMPLETE]
+        start_events = events.by_type.get(ToolLoopEventType.TOOL_CALL_START, [])
+        complete_events = events.by_type.get(ToolLoopEventType.TOOL_CALL_COMPLETE, [])
         assert len(start_events) == 2
         assert len(complete_events) == 2
         tool_names = {e.tool_name for e in start_events}
-        assert tool_names == {"tool_a", "tool_b"}
+        assert tool_names == _EXPECTED_AB
 
     @pytest.mark.asyncio
-    async def test_single_tool_stays_sequential(self, tmp_path: Path) -> None:
+    async def test_single_tool_stays_sequential(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """Single tool call doesn't use parallel path."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, handler = ok_tool
 
         provider = FakeProvider(
             [
                 _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
         assert result.content == "Done."
         assert result.tool_calls_made == 1
-        handler.assert_called_once()
-
+        assert handler.calls == 1
 
-# ---------------------------------------------------------------------------
-# Cost extraction from claude_code
-# ---------------------------------------------------------------------------
-
-
-class TestCostExtraction:
     @pytest.mark.asyncio
-    async def test_claude_code_cost_extracted(self, tmp_path: Path) -> None:
-        """Cost from claude_code tool result is accumulated into total_usage."""
-        cc_result = json.dumps({
-            "task": "Create file",
-            "success": True,
-            "output": "Done",
-            "cost_usd": 0.05,
-            "duration_ms": 5000,
-            "num_turns": 3,
-            "error": None,
-            "session_id": "sess-1",
-        })
-
-        handler = AsyncMock(return_value=cc_result)
-        registry = ToolRegistry()
-        registry.register(
-            ToolDefinition(
-                name="claude_code",
-                description="Claude Code SDK",
-                parameters={
-                    "type": "object",
-                    "properties": {"task": {"type": "string"}},
-                    "required": ["task"],
-                },
-                handler=handler,
-            )
-        )
+    async def test_max_parallel_tools_caps_in_flight(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
+        """No more than max_parallel_tools handlers run at the same time."""
+        in_flight = 0
+        peak = 0
+
+        async def counting_tool(arg: str) -> dict[str, Any]:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"result": arg}
 
+        names = [f"tool_{i}" for i in range(6)]
+        registry = _make_registry(*((n, counting_tool) for n in names))
         provider = FakeProvider(
             [
                 _tool_response(
-                    [ToolCall(id="tc_1", name="claude_code", arguments={"task": "do stuff"})]
-                ),
-                _text_response("Done."),
+                    [
+                        ToolCall(id=f"tc_{i}", name=n, arguments={"arg": str(i)})
+                        for i, n in enumerate(names)
+                    ]
+                ),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
-            messages=[{"role": "user", "content": "Use claude code"}],
+            messages=[{"role": "user", "content": "Do all"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
+            max_parallel_tools=2,
         )
 
-        assert result.total_usage.cost_usd == pytest.approx(0.05)
+        assert result.tool_calls_made == 6
+        assert peak == 2
+        tool_results = provider.messages_by_role[1]["tool"]
+        assert [m["tool_call_id"] for m in tool_results] == [f"tc_{i}" for i in range(6)]
 
     @pytest.mark.asyncio
-    async def test_non_claude_code_tool_no_cost(self, tmp_path: Path) -> None:
-        """Non-claude_code tools don't add cost."""
-        handler = AsyncMock(return_value=json.dumps({"cost_usd": 0.99}))
-        registry = _make_registry(("my_tool", handler))
-
+    async def test_parallel_many_tools(self, shared_ctx: ToolExecutionContext) -> None:
+        """A 100-call batch completes in order with the default concurrency bound."""
+        n_calls = 100
+        in_flight = 0
+        peak = 0
+
+        async def counting_tool(arg: str) -> dict[str, Any]:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return {"n": arg}
+
+        names = [f"t_{i}" for i in range(n_calls)]
         provider = FakeProvider(
             [
                 _tool_response(
-                    [ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]
+                    [
+                        ToolCall(id=f"tc_{i}", name=n, arguments={"arg": str(i)})
+                        for i, n in enumerate(names)
+                    ]
                 ),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
-            messages=[{"role": "user", "content": "Do it"}],
-            tools=registry,
-            ctx=ctx,
+            messages=[{"role": "user", "content": "Do all"}],
+            tools=_make_registry(*((n, counting_tool) for n in names)),
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
-        assert result.total_usage.cost_usd == 0.0
+        assert result.tool_calls_made == n_calls
+        assert 1 < peak <= 8
+        tool_results = provider.messages_by_role[1]["tool"]
+        assert [m["tool_call_id"] for m in tool_results] == [f"tc_{i}" for i in range(n_calls)]
+        assert [json.loads(m["content"])["n"] for m in tool_results] == [
+            str(i) for i in range(n_calls)
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Cost extraction from claude_code
+# ---------------------------------------------------------------------------
 
+
+_CC_RESULT_JSON = json.dumps(
+    {
+        "task": "Create file",
+        "success": True,
+        "output": "Done",
+        "cost_usd": 0.05,
+        "duration_ms": 5000,
+        "num_turns": 3,
+        "error": None,
+        "session_id": "sess-1",
+    }
+)
+_COST_ONLY_JSON = json.dumps({"cost_usd": 0.99})
+_INVALID_JSON_RESULT = "not json at all"
+
+
+class TestCostExtraction:
     @pytest.mark.asyncio
-    async def test_claude_code_cost_invalid_json_no_crash(self, tmp_path: Path) -> None:
-        """Invalid JSON from claude_code doesn't crash — cost is 0."""
-        handler = AsyncMock(return_value="not json at all")
+    async def test_claude_code_cost_extracted(self, shared_ctx: ToolExecutionContext) -> None:
+        """Cost from claude_code tool result is accumulated into total_usage."""
+        handler = AsyncMock(return_value=_CC_RESULT_JSON)
         registry = ToolRegistry()
         registry.register(
             ToolDefinition(
@@ -1472,251 +1618,194 @@ class TestCostExtraction:
                 _tool_response(
                     [ToolCall(id="tc_1", name="claude_code", arguments={"task": "do stuff"})]
                 ),
-                _text_response("Done."),
+                _DONE_RESPONSE,
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Use claude code"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
-        assert result.total_usage.cost_usd == 0.0
-
-
-# ---------------------------------------------------------------------------
-# Web search integration
-# ---------------------------------------------------------------------------
-
-
-class TestWebSearchIntegration:
-    @pytest.mark.asyncio
-    async def test_web_search_tool_injected_for_anthropic(self, tmp_path: Path) -> None:
-        """Web search tool spec is appended to tool_schemas for Anthropic providers."""
-
-        class AnthropicFake:
-            @property
-            def provider_name(self) -> str:
-                return "anthropic"
-
-            async def chat(
-                self,
-                messages: list[dict[str, Any]],
-                tools: list[dict[str, Any]] | None = None,
-                model: str | None = None,
-            ) -> LLMResponse:
-                # Verify web search tool is in the tools list
-                assert tools is not None
-                web_tools = [t for t in tools if t.get("type") == "web_search_20250305"]
-                assert len(web_tools) == 1
-                assert web_tools[0]["name"] == "web_search"
-                assert web_tools[0]["max_uses"] == 5
-                return _text_response("Done.")
-
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _open_profile()
-
-        result = await run_tool_loop(
-            provider=AnthropicFake(),
-            messages=[{"role": "user", "content": "Search for news"}],
-            tools=_make_registry(),
-            ctx=ctx,
-            system_prompt="",
-            model="claude-sonnet-4-20250514",
-            web_search_enabled=True,
-        )
-        assert result.content == "Done."
+        assert result.total_usage.cost_usd == pytest.approx(0.05)
 
     @pytest.mark.asyncio
-    async def test_web_search_not_injected_for_openai(self, tmp_path: Path) -> None:
-        """Web search tool is NOT injected for OpenAI providers."""
-
-        class OpenAIFake:
-            @property
-            def provider_name(self) -> str:
-                return "openai"
-
-            async def chat(
-                self,
-                messages: list[dict[str, Any]],
-                tools: list[dict[str, Any]] | None = None,
-                model: str | None = None,
-            ) -> LLMResponse:
-                # Verify no web search tool
-                if tools:
-                    web_tools = [t for t in tools if t.get("type") == "web_search_20250305"]
-                    assert len(web_tools) == 0
-                return _text_response("Done.")
-
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _open_profile()
+    async def test_non_claude_code_tool_no_cost(self, shared_ctx: ToolExecutionContext) -> None:
+        """Non-claude_code tools don't add cost."""
+        handler = AsyncMock(return_value=_COST_ONLY_JSON)
+        registry = _make_registry(("my_tool", handler))
 
-        result = await run_tool_loop(
-            provider=OpenAIFake(),
-            messages=[{"role": "user", "content": "Search for news"}],
-            tools=_make_registry(),
-            ctx=ctx,
-            system_prompt="",
-            model="gpt-4o",
-            web_search_enabled=True,
+        provider = FakeProvider(
+            [
+                _tool_response([ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})]),
+                _DONE_RESPONSE,
+            ]
         )
-        assert result.content == "Done."
-
-    @pytest.mark.asyncio
-    async def test_web_search_not_injected_when_disabled(self, tmp_path: Path) -> None:
-        """web_search_enabled=False means no web search tool."""
-        provider = FakeProvider([_text_response("Done.")])
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _open_profile()
 
         result = await run_tool_loop(
             provider=provider,
-            messages=[{"role": "user", "content": "Hi"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            messages=[{"role": "user", "content": "Do it"}],
+            tools=registry,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            web_search_enabled=False,
         )
-        # Check that no web_search_20250305 tool was passed
-        if provider.call_log[0]["tools"]:
-            for t in provider.call_log[0]["tools"]:
-                assert t.get("type") != "web_search_20250305"
-        assert result.content == "Done."
-
-    @pytest.mark.asyncio
-    async def test_web_search_permission_denied_skips(self, tmp_path: Path) -> None:
-        """If permission denies web_search, it's not injected."""
 
-        class AnthropicFake:
-            @property
-            def provider_name(self) -> str:
-                return "anthropic"
+        assert result.total_usage.cost_usd == 0.0
 
-            async def chat(
-                self,
-                messages: list[dict[str, Any]],
-                tools: list[dict[str, Any]] | None = None,
-                model: str | None = None,
-            ) -> LLMResponse:
-                # Should NOT have web search tool
-                if tools:
-                    web_tools = [t for t in tools if t.get("type") == "web_search_20250305"]
-                    assert len(web_tools) == 0
-                return _text_response("Done.")
+    @pytest.mark.asyncio
+    async def test_claude_code_cost_invalid_json_no_crash(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
+        """Invalid JSON from claude_code doesn't crash — cost is 0."""
+        handler = AsyncMock(return_value=_INVALID_JSON_RESULT)
+        registry = ToolRegistry()
+        registry.register(
+            ToolDefinition(
+                name="claude_code",
+                description="Claude Code SDK",
+                parameters={
+                    "type": "object",
+                    "properties": {"task": {"type": "string"}},
+                    "required": ["task"],
+                },
+                handler=handler,
+            )
+        )
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _deny_profile()
+        provider = FakeProvider(
+            [
+                _tool_response(
+                    [ToolCall(id="tc_1", name="claude_code", arguments={"task": "do stuff"})]
+                ),
+                _DONE_RESPONSE,
+            ]
+        )
 
         result = await run_tool_loop(
-            provider=AnthropicFake(),
-            messages=[{"role": "user", "content": "Search"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            provider=provider,
+            messages=[{"role": "user", "content": "Use claude code"}],
+            tools=registry,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
-            web_search_enabled=True,
         )
-        assert result.content == "Done."
-
-    @pytest.mark.asyncio
-    async def test_web_search_permission_ask_approved(self, tmp_path: Path) -> None:
-        """If permission is ASK and user approves, web search is injected."""
-
-        class AnthropicFake:
-            @property
-            def provider_name(self) -> str:
-                return "anthropic"
-
-            async def chat(
-                self,
-                messages: list[dict[str, Any]],
-                tools: list[dict[str, Any]] | None = None,
-                model: str | None = None,
-            ) -> LLMResponse:
-                assert tools is not None
-                web_tools = [t for t in tools if t.get("type") == "web_search_20250305"]
-                assert len(web_tools) == 1
-                return _text_response("Done.")
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _ask_profile()
+        assert result.total_usage.cost_usd == 0.0
 
-        ask_callback = AsyncMock(return_value=True)
 
-        result = await run_tool_loop(
-            provider=AnthropicFake(),
-            messages=[{"role": "user", "content": "Search"}],
-            tools=_make_registry(),
-            ctx=ctx,
-            system_prompt="",
-            model="test",
-            ask_callback=ask_callback,
-            web_search_enabled=True,
-        )
-        assert result.content == "Done."
-        ask_callback.assert_called_once()
+# ---------------------------------------------------------------------------
+# Web search integration
+# ---------------------------------------------------------------------------
 
-    @pytest.mark.asyncio
-    async def test_web_search_permission_ask_denied(self, tmp_path: Path) -> None:
-        """If permission is ASK and user denies, web search is NOT injected."""
 
-        class AnthropicFake:
-            @property
-            def provider_name(self) -> str:
-                return "anthropic"
+# Anthropic raw content blocks for server-side web search turns
+_RAW_BLOCKS_SEARCH_WITH_RESULTS = [
+    {"type": "text", "text": "Searching..."},
+    {
+        "type": "server_tool_use",
+        "id": "srv_1",
+        "name": "web_search",
+        "input": {"query": "test"},
+    },
+    {
+        "type": "web_search_tool_result",
+        "tool_use_id": "srv_1",
+        "content": [
+            {"type": "web_search_result", "url": "https://example.com"},
+        ],
+    },
+    {"type": "text", "text": "Found results."},
+]
+_RAW_BLOCKS_SEARCH_NO_RESULTS = [
+    {"type": "text", "text": "Searching..."},
+    {
+        "type": "server_tool_use",
+        "id": "srv_1",
+        "name": "web_search",
+        "input": {"query": "q"},
+    },
+    {
+        "type": "web_search_tool_result",
+        "tool_use_id": "srv_1",
+        "content": [],
+    },
+]
+_RAW_BLOCKS_SEARCH_STARTED = [
+    {"type": "text", "text": "Searching..."},
+    {"type": "server_tool_use", "id": "srv_1", "name": "web_search"},
+]
+
+
+class _NamedProvider(FakeProvider):
+    """A FakeProvider that reports an arbitrary ``provider_name``."""
+
+    def __init__(self, name: str, responses: list[LLMResponse]) -> None:
+        super().__init__(responses)
+        self._name = name
 
-            async def chat(
-                self,
-                messages: list[dict[str, Any]],
-                tools: list[dict[str, Any]] | None = None,
-                model: str | None = None,
-            ) -> LLMResponse:
-                if tools:
-                    web_tools = [t for t in tools if t.get("type") == "web_search_20250305"]
-                    assert len(web_tools) == 0
-                return _text_response("Done.")
+    @property
+    def provider_name(self) -> str:
+        return self._name
 
-        ctx = _make_ctx(tmp_path)
-        ctx.profile = _ask_profile()
 
-        ask_callback = AsyncMock(return_value=False)
+class TestWebSearchIntegration:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("provider_name", "profile_fn", "enabled", "ask_result", "expect_inject"),
+        [
+            pytest.param("anthropic", _open_profile, True, None, True, id="anthropic"),
+            pytest.param("openai", _open_profile, True, None, False, id="openai"),
+            pytest.param("anthropic", _open_profile, False, None, False, id="disabled"),
+            pytest.param("anthropic", _deny_profile, True, None, False, id="denied"),
+            pytest.param("anthropic", _ask_profile, True, True, True, id="ask-approved"),
+            pytest.param("anthropic", _ask_profile, True, False, False, id="ask-denied"),
+        ],
+    )
+    async def test_web_search_injection(
+        self,
+        shared_ctx: ToolExecutionContext,
+        provider_name: str,
+        profile_fn: Callable[[], PermissionProfile],
+        enabled: bool,
+        ask_result: bool | None,
+        expect_inject: bool,
+    ) -> None:
+        """The web search tool spec is injected only for Anthropic, when enabled and permitted."""
+        provider = _NamedProvider(provider_name, [_DONE_RESPONSE])
+        shared_ctx.profile = profile_fn()
+        ask_callback = AsyncMock(return_value=ask_result) if ask_result is not None else None
 
         result = await run_tool_loop(
-            provider=AnthropicFake(),
-            messages=[{"role": "user", "content": "Search"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            provider=provider,
+            messages=[{"role": "user", "content": "Search for news"}],
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             ask_callback=ask_callback,
-            web_search_enabled=True,
+            web_search_enabled=enabled,
         )
         assert result.content == "Done."
 
+        web_tools = [
+            t for t in provider.call_log[0]["tools"] or [] if t.get("type") == "web_search_20250305"
+        ]
+        assert bool(web_tools) == expect_inject
+        if expect_inject:
+            assert len(web_tools) == 1
+            assert web_tools[0]["name"] == "web_search"
+            assert web_tools[0]["max_uses"] == 5
+        if ask_callback is not None:
+            ask_callback.assert_called_once()
+
     @pytest.mark.asyncio
-    async def test_web_search_only_continues_loop(self, tmp_path: Path) -> None:
+    async def test_web_search_only_continues_loop(self, shared_ctx: ToolExecutionContext) -> None:
         """Server-side web search (no tool_calls) continues the loop instead of exiting."""
-        raw_blocks = [
-            {"type": "text", "text": "Searching..."},
-            {
-                "type": "server_tool_use", "id": "srv_1",
-                "name": "web_search", "input": {"query": "test"},
-            },
-            {
-                "type": "web_search_tool_result",
-                "tool_use_id": "srv_1",
-                "content": [
-                    {"type": "web_search_result", "url": "https://example.com"},
-                ],
-            },
-            {"type": "text", "text": "Found results."},
-        ]
 
         class AnthropicFake:
             _call_count = 0
@@ -1739,26 +1828,20 @@ class TestWebSearchIntegration:
                         stop_reason="end_turn",
                         usage=Usage(input_tokens=20, output_tokens=15),
                         model="claude-sonnet-4-20250514",
-                        _raw_content=raw_blocks,
+                        _raw_content=_RAW_BLOCKS_SEARCH_WITH_RESULTS,
                     )
-                asst_msgs = [
-                    m for m in messages
-                    if m.get("role") == "assistant"
-                ]
+                asst_msgs = [m for m in messages if m.get("role") == "assistant"]
                 assert any(
-                    m.get("_anthropic_content") == raw_blocks
+                    m.get("_anthropic_content") == _RAW_BLOCKS_SEARCH_WITH_RESULTS
                     for m in asst_msgs
                 ), "Expected _anthropic_content"
-                return _text_response(
-                    "Here are the results from my search."
-                )
+                return _text_response("Here are the results from my search.")
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=AnthropicFake(),
             messages=[{"role": "user", "content": "Search for something"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -1766,19 +1849,8 @@ class TestWebSearchIntegration:
         assert result.iterations == 2
 
     @pytest.mark.asyncio
-    async def test_web_search_only_final_response(self, tmp_path: Path) -> None:
+    async def test_web_search_only_final_response(self, shared_ctx: ToolExecutionContext) -> None:
         """Server-side web search followed by text response returns the text."""
-        raw_blocks = [
-            {"type": "text", "text": "Searching..."},
-            {
-                "type": "server_tool_use", "id": "srv_1",
-                "name": "web_search", "input": {"query": "q"},
-            },
-            {
-                "type": "web_search_tool_result",
-                "tool_use_id": "srv_1", "content": [],
-            },
-        ]
 
         class AnthropicFake:
             _call_count = 0
@@ -1801,32 +1873,32 @@ class TestWebSearchIntegration:
                         stop_reason="end_turn",
                         usage=Usage(input_tokens=10, output_tokens=5),
                         model="claude-sonnet-4-20250514",
-                        _raw_content=raw_blocks,
+                        _raw_content=_RAW_BLOCKS_SEARCH_NO_RESULTS,
                     )
                 return _text_response("The answer is 42.")
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=AnthropicFake(),
             messages=[{"role": "user", "content": "What is the answer?"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
         assert result.content == "The answer is 42."
 
     @pytest.mark.asyncio
-    async def test_web_search_raw_content_none_still_exits(self, tmp_path: Path) -> None:
+    async def test_web_search_raw_content_none_still_exits(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
         """Normal response (no _raw_content, no tool_calls) exits cleanly."""
         provider = FakeProvider([_text_response("Normal exit.")])
-        ctx = _make_ctx(tmp_path)
 
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Hi"}],
-            tools=_make_registry(),
-            ctx=ctx,
+            tools=_EMPTY_REGISTRY,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -1835,13 +1907,9 @@ class TestWebSearchIntegration:
 
     @pytest.mark.asyncio
     async def test_web_search_anthropic_content_preserved_on_assistant_msg(
-        self, tmp_path: Path
+        self, shared_ctx: ToolExecutionContext
     ) -> None:
         """When response has _raw_content, assistant_msg gets _anthropic_content."""
-        raw_blocks = [
-            {"type": "text", "text": "Searching..."},
-            {"type": "server_tool_use", "id": "srv_1", "name": "web_search"},
-        ]
 
         class AnthropicFake:
             _call_count = 0
@@ -1861,25 +1929,23 @@ class TestWebSearchIntegration:
                     resp = _tool_response(
                         [ToolCall(id="tc_1", name="create_file", arguments={"arg": "x"})]
                     )
-                    resp._raw_content = raw_blocks
+                    resp._raw_content = _RAW_BLOCKS_SEARCH_STARTED
                     return resp
                 # On second call, verify _anthropic_content was passed through
                 asst_msgs = [m for m in messages if m.get("role") == "assistant"]
                 assert any(
-                    m.get("_anthropic_content") == raw_blocks for m in asst_msgs
+                    m.get("_anthropic_content") == _RAW_BLOCKS_SEARCH_STARTED for m in asst_msgs
                 ), "Expected _anthropic_content on assistant message"
-                return _text_response("Done.")
+                return _DONE_RESPONSE
 
         handler = AsyncMock(return_value={"ok": True})
         registry = _make_registry(("create_file", handler))
 
-        ctx = _make_ctx(tmp_path)
-
         result = await run_tool_loop(
             provider=AnthropicFake(),
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -1905,6 +1971,21 @@ class TestTruncateToolLoopMessages:
         assert result[0]["role"] == "system"
         assert len(result) == 3
 
+    def test_returns_input_list_when_nothing_dropped(self) -> None:
+        msgs = [
+            {"role": "system", "content": "You are helpful."},
+            {"role": "user", "content": "Hello"},
+        ]
+        assert _truncate_tool_loop_messages(msgs, 100_000) is msgs
+
+    def test_late_system_message_moved_to_front(self) -> None:
+        msgs = [
+            {"role": "user", "content": "Hello"},
+            {"role": "system", "content": "Late system note."},
+        ]
+        result = _truncate_tool_loop_messages(msgs, 100_000)
+        assert result == [msgs[1], msgs[0]]
+
     def test_keeps_recent_messages_when_budget_tight(self) -> None:
         msgs = [
             {"role": "system", "content": "Sys."},
@@ -1990,6 +2071,46 @@ class TestTruncateToolLoopMessages:
         # Block 1 (the old big one) should be dropped
         assert not any("Result 1" in m.get("content", "") for m in result)
 
+    def test_token_cache_reused_across_calls(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A shared token_cache measures each message only once."""
+        measured: list[int] = []
+
+        def _counting(msg: dict[str, Any]) -> int:
+            measured.append(id(msg))
+            return estimate_message_tokens(msg)
+
+        monkeypatch.setattr("chorus.llm.tool_loop.estimate_message_tokens", _counting)
+        msgs = [
+            {"role": "system", "content": "Sys"},
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi!"},
+        ]
+        cache: dict[int, tuple[dict[str, Any], int]] = {}
+
+        first = list(_truncate_tool_loop_messages(msgs, 100_000, cache))
+        msgs.append({"role": "user", "content": "Again"})
+        second = _truncate_tool_loop_messages(msgs, 100_000, cache)
+
+        assert first == msgs[:3]
+        assert second == msgs
+        assert sorted(measured) == sorted(id(m) for m in msgs)
+
+    def test_cutoff_matches_linear_scan(self) -> None:
+        """Every budget keeps exactly the longest suffix of blocks that fits."""
+        blocks = [[{"role": "user", "content": "u" * (40 * i)}] for i in range(1, 8)]
+        msgs = [{"role": "system", "content": "Sys"}] + [m for b in blocks for m in b]
+        system_tokens = estimate_message_tokens(msgs[0])
+        sizes = [estimate_message_tokens(b[0]) for b in blocks]
+
+        for budget in range(system_tokens + 1, system_tokens + sum(sizes) + 10, 7):
+            kept, total = 0, 0
+            for size in reversed(sizes):
+                if total + size > budget - system_tokens:
+                    break
+                kept, total = kept + 1, total + size
+            expected = [msgs[0], *msgs[len(msgs) - kept :]]
+            assert _truncate_tool_loop_messages(msgs, budget) == expected, budget
+
     def test_system_only_when_budget_tiny(self) -> None:
         msgs = [
             {"role": "system", "content": "Prompt."},
@@ -2022,8 +2143,10 @@ class TestTruncateToolLoopMessages:
 
 class TestToolLoopMidLoopTruncation:
     @pytest.mark.asyncio
-    async def test_large_tool_results_dont_blow_up_context(self, tmp_path: Path) -> None:
-        """Tool results that push past MAX_INPUT_TOKENS get truncated on next iteration."""
+    async def test_large_tool_result_capped_before_history(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
+        """An oversized tool result is capped before it enters the message history."""
         # Return a massive result from the first tool call
         big_result = "x" * 800_000  # ~200K tokens, will exceed budget
         handler = AsyncMock(return_value=big_result)
@@ -2036,19 +2159,92 @@ class TestToolLoopMidLoopTruncation:
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="System",
             model="claude-sonnet-4-20250514",
         )
 
-        # Loop should complete successfully (truncation prevented oversize context)
         assert result.content == "Done despite big result."
         assert result.iterations == 2
+        tool_msgs = provider.messages_by_role[1]["tool"]
+        assert len(tool_msgs[0]["content"]) < 50_000
+
+    @pytest.mark.asyncio
+    async def test_overflowing_tool_results_drop_older_blocks(
+        self, shared_ctx: ToolExecutionContext, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Once results push past MAX_INPUT_TOKENS, the oldest blocks are dropped."""
+        chunk = "lorem ipsum dolor sit amet " * 400
+        per_result = estimate_message_tokens(
+            {"role": "tool", "tool_call_id": "tc_1", "content": chunk}
+        )
+        # Room for the two most recent tool blocks, not three
+        monkeypatch.setattr("chorus.llm.tool_loop.MAX_INPUT_TOKENS", per_result * 2 + 500)
+        handler = AsyncMock(return_value=chunk)
+
+        provider = FakeProvider(
+            [
+                *(
+                    _tool_response([ToolCall(id=f"tc_{i}", name="my_tool", arguments={"arg": "x"})])
+                    for i in (1, 2, 3)
+                ),
+                _DONE_RESPONSE,
+            ]
+        )
+        result = await run_tool_loop(
+            provider=provider,
+            messages=[{"role": "user", "content": "Do it"}],
+            tools=_make_registry(("my_tool", handler)),
+            ctx=shared_ctx,
+            system_prompt="System",
+            model="test",
+        )
+
+        assert result.iterations == 4
+        # Third call still fits both results
+        assert [m["tool_call_id"] for m in provider.messages_by_role[2]["tool"]] == [
+            "tc_1",
+            "tc_2",
+        ]
+        # Fourth call lost the original user turn and the oldest tool block
+        last = provider.messages_by_role[3]
+        assert last["user"] == []
+        assert [m["tool_call_id"] for m in last["tool"]] == ["tc_2", "tc_3"]
+        assert all(m["tool_calls"] for m in last["assistant"])
+
+    @pytest.mark.asyncio
+    async def test_each_message_measured_once_across_iterations(
+        self, shared_ctx: ToolExecutionContext, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A large tool result is sized once, not again on every later iteration."""
+        measured: list[int] = []
+
+        def _counting(msg: dict[str, Any]) -> int:
+            measured.append(id(msg))
+            return estimate_message_tokens(msg)
+
+        monkeypatch.setattr("chorus.llm.tool_loop.estimate_message_tokens", _counting)
+        handler = AsyncMock(return_value="x" * 100_000)
+        call = ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})
+
+        provider = FakeProvider(
+            [_tool_response([call]), _tool_response([call]), _tool_response([call]), _DONE_RESPONSE]
+        )
+        result = await run_tool_loop(
+            provider=provider,
+            messages=[{"role": "user", "content": "Do it"}],
+            tools=_make_registry(("my_tool", handler)),
+            ctx=shared_ctx,
+            system_prompt="System",
+            model="test",
+        )
+
+        assert result.iterations == 4
+        assert len(measured) == len(set(measured))
 
 
 # ---------------------------------------------------------------------------
@@ -2149,28 +2345,28 @@ class TestValidateToolArguments:
 # ---------------------------------------------------------------------------
 
 
+# Ten calls to an always-failing tool; the breaker trips on the fifth.
+_FAILING_TOOL_RESPONSES: tuple[LLMResponse, ...] = tuple(
+    _tool_response([ToolCall(id=f"tc_{i}", name="failing_tool", arguments={"arg": str(i)})])
+    for i in range(10)
+)
+
+
 class TestCircuitBreaker:
     @pytest.mark.asyncio
-    async def test_trips_after_consecutive_errors(self, tmp_path: Path) -> None:
+    async def test_trips_after_consecutive_errors(self, shared_ctx: ToolExecutionContext) -> None:
         """Loop stops early after 5 consecutive tool errors."""
         handler = AsyncMock(side_effect=RuntimeError("always fails"))
         registry = _make_registry(("failing_tool", handler))
 
-        # Provider always returns a tool call — loop would normally run max_iterations
-        responses = [
-            _tool_response(
-                [ToolCall(id=f"tc_{i}", name="failing_tool", arguments={"arg": str(i)})]
-            )
-            for i in range(20)
-        ]
-        provider = FakeProvider(responses)
+        # Provider always returns a tool call — loop would normally run until it runs dry
+        provider = FakeProvider(list(_FAILING_TOOL_RESPONSES))
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             max_iterations=20,
@@ -2178,10 +2374,10 @@ class TestCircuitBreaker:
 
         assert "consecutive tool errors" in (result.content or "").lower()
         assert result.tool_calls_made == 5
-        assert result.iterations < 20
+        assert result.iterations < len(_FAILING_TOOL_RESPONSES)
 
     @pytest.mark.asyncio
-    async def test_resets_on_success(self, tmp_path: Path) -> None:
+    async def test_resets_on_success(self, shared_ctx: ToolExecutionContext) -> None:
         """A successful call resets the consecutive error counter."""
         call_count = 0
 
@@ -2197,20 +2393,17 @@ class TestCircuitBreaker:
         registry = _make_registry(("flaky_tool", handler))
 
         responses = [
-            _tool_response(
-                [ToolCall(id=f"tc_{i}", name="flaky_tool", arguments={"arg": str(i)})]
-            )
+            _tool_response([ToolCall(id=f"tc_{i}", name="flaky_tool", arguments={"arg": str(i)})])
             for i in range(12)
         ]
-        responses.append(_text_response("Done."))
+        responses.append(_DONE_RESPONSE)
         provider = FakeProvider(responses)
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             max_iterations=15,
@@ -2220,41 +2413,33 @@ class TestCircuitBreaker:
         assert "consecutive tool errors" not in (result.content or "").lower()
 
     @pytest.mark.asyncio
-    async def test_fires_loop_complete_event(self, tmp_path: Path) -> None:
+    async def test_fires_loop_complete_event(self, shared_ctx: ToolExecutionContext) -> None:
         """Circuit breaker fires LOOP_COMPLETE event when it trips."""
         handler = AsyncMock(side_effect=RuntimeError("fail"))
         registry = _make_registry(("failing_tool", handler))
 
-        responses = [
-            _tool_response(
-                [ToolCall(id=f"tc_{i}", name="failing_tool", arguments={"arg": str(i)})]
-            )
-            for i in range(10)
-        ]
-        provider = FakeProvider(responses)
-
-        events: list[ToolLoopEvent] = []
+        provider = FakeProvider(list(_FAILING_TOOL_RESPONSES))
 
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
+        events = _EventIndex()
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             max_iterations=10,
-            on_event=recorder,
+            on_event=events,
         )
 
-        loop_complete = [e for e in events if e.type == ToolLoopEventType.LOOP_COMPLETE]
+        loop_complete = events.by_type.get(ToolLoopEventType.LOOP_COMPLETE, [])
         assert len(loop_complete) == 1
 
     @pytest.mark.asyncio
-    async def test_circuit_breaker_with_validation_errors(self, tmp_path: Path) -> None:
+    async def test_circuit_breaker_with_validation_errors(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
         """Validation errors (missing args) also trip the circuit breaker."""
         handler = AsyncMock(return_value={"ok": True})
         registry = ToolRegistry()
@@ -2283,12 +2468,11 @@ class TestCircuitBreaker:
         ]
         provider = FakeProvider(responses)
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Create file"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             max_iterations=10,
@@ -2305,7 +2489,9 @@ class TestCircuitBreaker:
 
 class TestTypeErrorMessages:
     @pytest.mark.asyncio
-    async def test_typeerror_includes_provided_and_expected(self, tmp_path: Path) -> None:
+    async def test_typeerror_includes_provided_and_expected(
+        self, shared_ctx: ToolExecutionContext
+    ) -> None:
         """TypeError catch provides both provided and expected arg lists."""
 
         async def strict_tool(*, path: str, content: str) -> dict[str, Any]:
@@ -2335,29 +2521,29 @@ class TestTypeErrorMessages:
         provider = FakeProvider(
             [
                 _tool_response(
-                    [ToolCall(
-                        id="tc_1",
-                        name="strict_tool",
-                        arguments={"path": "a.txt", "content": "hello"},
-                    )]
+                    [
+                        ToolCall(
+                            id="tc_1",
+                            name="strict_tool",
+                            arguments={"path": "a.txt", "content": "hello"},
+                        )
+                    ]
                 ),
                 _text_response("Error handled."),
             ]
         )
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
         # Check that the error fed back to LLM contains provided/expected info
-        second_call_msgs = provider.call_log[1]["messages"]
-        tool_results = [m for m in second_call_msgs if m.get("role") == "tool"]
+        tool_results = provider.messages_by_role[1]["tool"]
         assert len(tool_results) == 1
         error_content = tool_results[0]["content"]
         assert "Provided arguments" in error_content
@@ -2387,18 +2573,55 @@ class TestIsErrorResult:
     def test_json_array(self) -> None:
         assert _is_error_result(json.dumps([{"error": "x"}])) is False
 
+    def test_leading_whitespace_and_non_leading_error_key(self) -> None:
+        assert _is_error_result('  \n{"result": "ok", "error": "late"}') is True
+
+    def test_text_mentioning_error_key(self) -> None:
+        assert _is_error_result('Output: {"error": "x"}') is False
+
+
+# ---------------------------------------------------------------------------
+# _cap_tool_result helper
+# ---------------------------------------------------------------------------
+
+
+class TestCapToolResult:
+    def test_short_result_unchanged(self) -> None:
+        content = "x" * 64_000
+        assert _cap_tool_result(content) is content
+
+    def test_long_result_keeps_head_and_tail(self) -> None:
+        content = "h" * 32_000 + "m" * 100_000 + "t" * 16_000
+        capped = _cap_tool_result(content)
+        assert capped.startswith("h" * 32_000 + "\n\n[... truncated 100000 of 148000 chars")
+        assert capped.endswith("...]\n\n" + "t" * 16_000)
+        assert "m" not in capped
+
 
 # ---------------------------------------------------------------------------
 # max_tokens truncation — reproduces the $5.45 bug
 # ---------------------------------------------------------------------------
 
 
+# Ten consecutive truncated tool-call responses; enough to trip the breaker.
+_MAX_TOKEN_RESPONSES: tuple[LLMResponse, ...] = tuple(
+    LLMResponse(
+        content="...",
+        tool_calls=[ToolCall(id=f"tc_{i}", name="my_tool", arguments={"arg": "x"})],
+        stop_reason="max_tokens",
+        usage=Usage(input_tokens=100, output_tokens=4096),
+        model="test",
+    )
+    for i in range(10)
+)
+
+
 class TestMaxTokensTruncation:
     """Tests for stop_reason='max_tokens' handling — truncated tool calls
     are discarded and the LLM is told to retry with shorter content."""
 
     @pytest.mark.asyncio
-    async def test_truncated_tool_calls_discarded(self, tmp_path: Path) -> None:
+    async def test_truncated_tool_calls_discarded(self, shared_ctx: ToolExecutionContext) -> None:
         """Tool calls from a max_tokens response are never executed."""
         handler = AsyncMock(return_value={"ok": True})
         registry = ToolRegistry()
@@ -2422,11 +2645,13 @@ class TestMaxTokensTruncation:
         responses = [
             LLMResponse(
                 content="I'll create the file now.",
-                tool_calls=[ToolCall(
-                    id="tc_1",
-                    name="create_file",
-                    arguments={"path": "fib.py"},  # 'content' truncated
-                )],
+                tool_calls=[
+                    ToolCall(
+                        id="tc_1",
+                        name="create_file",
+                        arguments={"path": "fib.py"},  # 'content' truncated
+                    )
+                ],
                 stop_reason="max_tokens",
                 usage=Usage(input_tokens=1000, output_tokens=4096),
                 model="claude-sonnet-4-20250514",
@@ -2435,12 +2660,11 @@ class TestMaxTokensTruncation:
         ]
         provider = FakeProvider(responses)
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Create a fibonacci benchmark"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
@@ -2450,10 +2674,11 @@ class TestMaxTokensTruncation:
         assert result.iterations == 2
 
     @pytest.mark.asyncio
-    async def test_truncation_feedback_sent_to_llm(self, tmp_path: Path) -> None:
+    async def test_truncation_feedback_sent_to_llm(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """The LLM receives a message explaining the truncation."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, handler = ok_tool
 
         call_count = 0
 
@@ -2486,45 +2711,32 @@ class TestMaxTokensTruncation:
                 ), "Expected truncation feedback in messages"
                 return _text_response("Understood, splitting work.")
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=TruncatingProvider(),
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
         assert result.iterations == 2
-        handler.assert_not_called()
+        assert handler.calls == 0
 
     @pytest.mark.asyncio
-    async def test_repeated_truncation_trips_circuit_breaker(self, tmp_path: Path) -> None:
+    async def test_repeated_truncation_trips_circuit_breaker(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """If the LLM keeps hitting max_tokens, circuit breaker stops the loop."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, handler = ok_tool
 
-        responses = [
-            LLMResponse(
-                content="Trying again...",
-                tool_calls=[ToolCall(
-                    id=f"tc_{i}", name="my_tool", arguments={"arg": "x"},
-                )],
-                stop_reason="max_tokens",
-                usage=Usage(input_tokens=500, output_tokens=4096),
-                model="test",
-            )
-            for i in range(20)
-        ]
-        provider = FakeProvider(responses)
+        provider = FakeProvider(list(_MAX_TOKEN_RESPONSES))
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             max_iterations=20,
@@ -2534,73 +2746,62 @@ class TestMaxTokensTruncation:
         assert "output token limit" in (result.content or "").lower()
         assert result.tool_calls_made == 0
         assert result.iterations == 5  # trips on 5th
-        handler.assert_not_called()
+        assert handler.calls == 0
 
     @pytest.mark.asyncio
-    async def test_normal_stop_reason_still_executes_tools(self, tmp_path: Path) -> None:
+    async def test_normal_stop_reason_still_executes_tools(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """stop_reason='tool_use' (normal) still executes tool calls as before."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
+        registry, handler = ok_tool
 
-        provider = FakeProvider([
-            LLMResponse(
-                content="Calling tool...",
-                tool_calls=[ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})],
-                stop_reason="tool_use",
-                usage=Usage(input_tokens=20, output_tokens=15),
-                model="test",
-            ),
-            _text_response("Done."),
-        ])
+        provider = FakeProvider(
+            [
+                LLMResponse(
+                    content="Calling tool...",
+                    tool_calls=[ToolCall(id="tc_1", name="my_tool", arguments={"arg": "x"})],
+                    stop_reason="tool_use",
+                    usage=Usage(input_tokens=20, output_tokens=15),
+                    model="test",
+                ),
+                _DONE_RESPONSE,
+            ]
+        )
 
-        ctx = _make_ctx(tmp_path)
         result = await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
         )
 
         assert result.content == "Done."
         assert result.tool_calls_made == 1
-        handler.assert_called_once()
+        assert handler.calls == 1
 
     @pytest.mark.asyncio
-    async def test_max_tokens_fires_loop_complete_on_breaker(self, tmp_path: Path) -> None:
+    async def test_max_tokens_fires_loop_complete_on_breaker(
+        self, shared_ctx: ToolExecutionContext, ok_tool: tuple[ToolRegistry, _CountingHandler]
+    ) -> None:
         """Circuit breaker from max_tokens fires LOOP_COMPLETE event."""
-        handler = AsyncMock(return_value={"ok": True})
-        registry = _make_registry(("my_tool", handler))
-
-        responses = [
-            LLMResponse(
-                content="...",
-                tool_calls=[ToolCall(id=f"tc_{i}", name="my_tool", arguments={"arg": "x"})],
-                stop_reason="max_tokens",
-                usage=Usage(input_tokens=100, output_tokens=4096),
-                model="test",
-            )
-            for i in range(10)
-        ]
-        provider = FakeProvider(responses)
+        registry, _ = ok_tool
 
-        events: list[ToolLoopEvent] = []
+        provider = FakeProvider(list(_MAX_TOKEN_RESPONSES))
 
-        async def recorder(event: ToolLoopEvent) -> None:
-            events.append(event)
+        events = _EventIndex()
 
-        ctx = _make_ctx(tmp_path)
         await run_tool_loop(
             provider=provider,
             messages=[{"role": "user", "content": "Do it"}],
             tools=registry,
-            ctx=ctx,
+            ctx=shared_ctx,
             system_prompt="",
             model="test",
             max_iterations=10,
-            on_event=recorder,
+            on_event=events,
         )
 
-        loop_complete = [e for e in events if e.type == ToolLoopEventType.LOOP_COMPLETE]
+        loop_complete = events.by_type.get(ToolLoopEventType.LOOP_COMPLETE, [])
         assert len(loop_complete) == 1
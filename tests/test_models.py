@@ -48,11 +48,7 @@ class TestAgentModel:
         )
         data = agent.to_dict()
         roundtripped = Agent.from_dict(data)
-        assert roundtripped.name == agent.name
-        assert roundtripped.channel_id == agent.channel_id
-        assert roundtripped.model == agent.model
-        assert roundtripped.system_prompt == agent.system_prompt
-        assert roundtripped.permissions == agent.permissions
+        assert roundtripped == agent
 
     def test_agent_defaults(self) -> None:
         agent = Agent(name="test-agent", channel_id=999)
@@ -61,21 +57,14 @@ class TestAgentModel:
         assert agent.system_prompt is not None
         assert agent.created_at is not None
 
-    def test_agent_rejects_invalid_name_uppercase(self) -> None:
+    @pytest.mark.parametrize(
+        "name",
+        ["Bad-Name", "my_agent!", "a", "a" * 33],
+        ids=["uppercase", "special_chars", "too_short", "too_long"],
+    )
+    def test_agent_rejects_invalid_name(self, name: str) -> None:
         with pytest.raises(InvalidAgentNameError):
-            validate_agent_name("Bad-Name")
-
-    def test_agent_rejects_invalid_name_special_chars(self) -> None:
-        with pytest.raises(InvalidAgentNameError):
-            validate_agent_name("my_agent!")
-
-    def test_agent_rejects_name_too_short(self) -> None:
-        with pytest.raises(InvalidAgentNameError):
-            validate_agent_name("a")
-
-    def test_agent_rejects_name_too_long(self) -> None:
-        with pytest.raises(InvalidAgentNameError):
-            validate_agent_name("a" * 33)
+            validate_agent_name(name)
 
     def test_agent_accepts_valid_hyphenated_name(self) -> None:
         validate_agent_name("my-cool-agent")  # Should not raise
@@ -0,0 +1,27 @@
+"""Shared fixtures for the permission tests."""
+
+from __future__ import annotations
+
+import pytest
+
+from chorus.permissions.engine import PermissionProfile, get_preset
+
+
+@pytest.fixture(scope="session")
+def open_preset() -> PermissionProfile:
+    return get_preset("open")
+
+
+@pytest.fixture(scope="session")
+def standard_preset() -> PermissionProfile:
+    return get_preset("standard")
+
+
+@pytest.fixture(scope="session")
+def guarded_preset() -> PermissionProfile:
+    return get_preset("guarded")
+
+
+@pytest.fixture(scope="session")
+def locked_preset() -> PermissionProfile:
+    return get_preset("locked")
@@ -2,35 +2,48 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
 
 import pytest
 
 from chorus.permissions.ask_ui import PermissionAskView
 
 
+def _mk_interaction(user_id: int) -> SimpleNamespace:
+    """Build a minimal interaction stand-in; only ``send_message`` is a mock."""
+    return SimpleNamespace(
+        user=SimpleNamespace(id=user_id),
+        response=SimpleNamespace(send_message=AsyncMock()),
+    )
+
+
+@pytest.fixture
+def interaction() -> SimpleNamespace:
+    """An interaction from the requester (user 12345)."""
+    return _mk_interaction(12345)
+
+
+@pytest.fixture
+async def view() -> PermissionAskView:
+    """A fresh view per test, built inside the test's event loop like in production."""
+    return PermissionAskView(requester_id=12345)
+
+
 class TestAskViewAllowSetsValueTrue:
     @pytest.mark.asyncio
-    async def test_allow_button_sets_value_true(self) -> None:
-        view = PermissionAskView(requester_id=12345)
-        interaction = MagicMock()
-        interaction.user.id = 12345
-        interaction.response = MagicMock()
-        interaction.response.send_message = AsyncMock()
-
+    async def test_allow_button_sets_value_true(
+        self, view: PermissionAskView, interaction: SimpleNamespace
+    ) -> None:
         # Call the allow callback directly (self is already bound)
         await view.allow.callback(interaction)
 
         assert view.value is True
 
     @pytest.mark.asyncio
-    async def test_allow_sends_ephemeral_response(self) -> None:
-        view = PermissionAskView(requester_id=12345)
-        interaction = MagicMock()
-        interaction.user.id = 12345
-        interaction.response = MagicMock()
-        interaction.response.send_message = AsyncMock()
-
+    async def test_allow_sends_ephemeral_response(
+        self, view: PermissionAskView, interaction: SimpleNamespace
+    ) -> None:
         await view.allow.callback(interaction)
 
         interaction.response.send_message.assert_called_once_with("Approved.", ephemeral=True)
@@ -38,25 +51,17 @@ class TestAskViewAllowSetsValueTrue:
 
 class TestAskViewDenySetsValueFalse:
     @pytest.mark.asyncio
-    async def test_deny_button_sets_value_false(self) -> None:
-        view = PermissionAskView(requester_id=12345)
-        interaction = MagicMock()
-        interaction.user.id = 12345
-        interaction.response = MagicMock()
-        interaction.response.send_message = AsyncMock()
-
+    async def test_deny_button_sets_value_false(
+        self, view: PermissionAskView, interaction: SimpleNamespace
+    ) -> None:
         await view.deny.callback(interaction)
 
         assert view.value is False
 
     @pytest.mark.asyncio
-    async def test_deny_sends_ephemeral_response(self) -> None:
-        view = PermissionAskView(requester_id=12345)
-        interaction = MagicMock()
-        interaction.user.id = 12345
-        interaction.response = MagicMock()
-        interaction.response.send_message = AsyncMock()
-
+    async def test_deny_sends_ephemeral_response(
+        self, view: PermissionAskView, interaction: SimpleNamespace
+    ) -> None:
         await view.deny.callback(interaction)
 
         interaction.response.send_message.assert_called_once_with("Denied.", ephemeral=True)
@@ -64,13 +69,11 @@ class TestAskViewDenySetsValueFalse:
 
 class TestAskViewTimeoutLeavesValueNone:
     @pytest.mark.asyncio
-    async def test_initial_value_is_none(self) -> None:
-        view = PermissionAskView(requester_id=12345)
+    async def test_initial_value_is_none(self, view: PermissionAskView) -> None:
         assert view.value is None
 
     @pytest.mark.asyncio
-    async def test_timeout_disables_buttons(self) -> None:
-        view = PermissionAskView(requester_id=12345)
+    async def test_timeout_disables_buttons(self, view: PermissionAskView) -> None:
         await view.on_timeout()
         for child in view.children:
             assert child.disabled is True  # type: ignore[union-attr]
@@ -78,28 +81,23 @@ class TestAskViewTimeoutLeavesValueNone:
 
 class TestAskViewInteractionCheck:
     @pytest.mark.asyncio
-    async def test_rejects_wrong_user(self) -> None:
-        view = PermissionAskView(requester_id=12345)
-        interaction = MagicMock()
-        interaction.user.id = 99999
+    async def test_rejects_wrong_user(self, view: PermissionAskView) -> None:
+        interaction = _mk_interaction(99999)
 
         result = await view.interaction_check(interaction)
         assert result is False
 
     @pytest.mark.asyncio
-    async def test_allows_requester(self) -> None:
-        view = PermissionAskView(requester_id=12345)
-        interaction = MagicMock()
-        interaction.user.id = 12345
-
+    async def test_allows_requester(
+        self, view: PermissionAskView, interaction: SimpleNamespace
+    ) -> None:
         result = await view.interaction_check(interaction)
         assert result is True
 
 
 class TestAskViewDisablesButtonsOnTimeout:
     @pytest.mark.asyncio
-    async def test_all_children_disabled_after_timeout(self) -> None:
-        view = PermissionAskView(requester_id=12345)
+    async def test_all_children_disabled_after_timeout(self, view: PermissionAskView) -> None:
         # Verify buttons exist and are initially enabled
         assert len(list(view.children)) > 0
         for child in view.children:
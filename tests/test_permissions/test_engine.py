@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import dataclasses
+import importlib.util
+import re
+
 import pytest
 
 from chorus.permissions.engine import (
@@ -15,6 +19,8 @@ from chorus.permissions.engine import (
     get_preset,
 )
 
+_HAS_RE2 = importlib.util.find_spec("re2") is not None
+
 # ---------------------------------------------------------------------------
 # Core matching logic
 # ---------------------------------------------------------------------------
@@ -70,67 +76,56 @@ class TestCheckFullActionStringFormat:
 # ---------------------------------------------------------------------------
 
 
-class TestPresetOpen:
-    def test_allows_everything(self) -> None:
-        p = get_preset("open")
-        assert check("tool:file:create /anything", p) is PermissionResult.ALLOW
-        assert check("tool:self_edit:system_prompt", p) is PermissionResult.ALLOW
-
-    def test_allows_bash_rm(self) -> None:
-        p = get_preset("open")
-        assert check("tool:bash:rm -rf /", p) is PermissionResult.ALLOW
-
-
-class TestPresetStandard:
-    def test_allows_file_create(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:file:create /src/app.py", p) is PermissionResult.ALLOW
-
-    def test_allows_file_view(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:file:view /src/app.py", p) is PermissionResult.ALLOW
-
-    def test_asks_bash(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:bash:pip install requests", p) is PermissionResult.ASK
-
-    def test_asks_git_push(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:git:push origin main", p) is PermissionResult.ASK
+ALLOW = PermissionResult.ALLOW
+ASK = PermissionResult.ASK
+DENY = PermissionResult.DENY
 
-    def test_allows_git_commit(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:git:commit -m 'init'", p) is PermissionResult.ALLOW
 
-    def test_asks_self_edit_system_prompt(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:self_edit:system_prompt", p) is PermissionResult.ASK
-
-    def test_allows_self_edit_docs(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:self_edit:docs README.md", p) is PermissionResult.ALLOW
+class TestPresetOpen:
+    @pytest.mark.parametrize(
+        ("action", "expected"),
+        [
+            ("tool:file:create /anything", ALLOW),
+            ("tool:self_edit:system_prompt", ALLOW),
+            ("tool:bash:rm -rf /", ALLOW),
+        ],
+    )
+    def test_matrix(
+        self, open_preset: PermissionProfile, action: str, expected: PermissionResult
+    ) -> None:
+        assert check(action, open_preset) is expected
 
-    def test_asks_self_edit_permissions(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:self_edit:permissions open", p) is PermissionResult.ASK
 
-    def test_asks_self_edit_model(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:self_edit:model gpt-4o", p) is PermissionResult.ASK
+class TestPresetStandard:
+    @pytest.mark.parametrize(
+        ("action", "expected"),
+        [
+            ("tool:file:create /src/app.py", ALLOW),
+            ("tool:file:view /src/app.py", ALLOW),
+            ("tool:bash:pip install requests", ASK),
+            ("tool:git:push origin main", ASK),
+            ("tool:git:commit -m 'init'", ALLOW),
+            ("tool:self_edit:system_prompt", ASK),
+            ("tool:self_edit:docs README.md", ALLOW),
+            ("tool:self_edit:permissions open", ASK),
+            ("tool:self_edit:model gpt-4o", ASK),
+        ],
+    )
+    def test_matrix(
+        self, standard_preset: PermissionProfile, action: str, expected: PermissionResult
+    ) -> None:
+        assert check(action, standard_preset) is expected
 
 
 class TestPresetStandardWebSearch:
-    def test_standard_preset_asks_web_search(self) -> None:
-        p = get_preset("standard")
-        assert check("tool:web_search:enabled", p) is PermissionResult.ASK
+    def test_standard_preset_asks_web_search(self, standard_preset: PermissionProfile) -> None:
+        assert check("tool:web_search:enabled", standard_preset) is PermissionResult.ASK
 
-    def test_open_preset_allows_web_search(self) -> None:
-        p = get_preset("open")
-        assert check("tool:web_search:enabled", p) is PermissionResult.ALLOW
+    def test_open_preset_allows_web_search(self, open_preset: PermissionProfile) -> None:
+        assert check("tool:web_search:enabled", open_preset) is PermissionResult.ALLOW
 
-    def test_locked_preset_denies_web_search(self) -> None:
-        p = get_preset("locked")
-        assert check("tool:web_search:enabled", p) is PermissionResult.DENY
+    def test_locked_preset_denies_web_search(self, locked_preset: PermissionProfile) -> None:
+        assert check("tool:web_search:enabled", locked_preset) is PermissionResult.DENY
 
 
 class TestDenyPatterns:
@@ -160,92 +155,59 @@ class TestDenyPatterns:
 
 
 class TestPresetGuarded:
-    def test_allows_normal_bash(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:ls -la", p) is PermissionResult.ALLOW
-        assert check("tool:bash:cat README.md", p) is PermissionResult.ALLOW
-
-    def test_allows_file_ops(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:file:create /src/app.py", p) is PermissionResult.ALLOW
-
-    def test_denies_gh_create(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:gh pr create --title test", p) is PermissionResult.DENY
-        assert check("tool:bash:gh issue create --body hello", p) is PermissionResult.DENY
-
-    def test_denies_gh_delete(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:gh release delete v1.0", p) is PermissionResult.DENY
-
-    def test_denies_gh_close_merge(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:gh pr close 42", p) is PermissionResult.DENY
-        assert check("tool:bash:gh pr merge 42", p) is PermissionResult.DENY
-
-    def test_allows_gh_reads(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:gh pr list", p) is PermissionResult.ALLOW
-        assert check("tool:bash:gh pr view 42", p) is PermissionResult.ALLOW
-        assert check("tool:bash:gh issue list", p) is PermissionResult.ALLOW
-        assert check("tool:bash:gh repo view", p) is PermissionResult.ALLOW
-
-    def test_denies_gh_api_writes(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:gh api repos/foo/bar -X POST", p) is PermissionResult.DENY
-        assert check("tool:bash:gh api repos/foo/bar --method DELETE", p) is PermissionResult.DENY
-
-    def test_allows_gh_api_reads(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:gh api repos/foo/bar", p) is PermissionResult.ALLOW
-
-    def test_denies_doctl_create(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:doctl compute droplet create myvm", p) is PermissionResult.DENY
-        assert check("tool:bash:doctl apps create --spec app.yaml", p) is PermissionResult.DENY
-
-    def test_denies_doctl_delete(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:doctl compute droplet delete 123", p) is PermissionResult.DENY
-
-    def test_allows_doctl_reads(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:bash:doctl compute droplet list", p) is PermissionResult.ALLOW
-        assert check("tool:bash:doctl account get", p) is PermissionResult.ALLOW
-
-    def test_denies_git_push(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:git:push origin main", p) is PermissionResult.DENY
-
-    def test_denies_git_merge_request(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:git:merge_request", p) is PermissionResult.DENY
-
-    def test_allows_git_commit(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:git:commit -m 'init'", p) is PermissionResult.ALLOW
-
-    def test_allows_self_edit(self) -> None:
-        p = get_preset("guarded")
-        assert check("tool:self_edit:system_prompt", p) is PermissionResult.ALLOW
+    @pytest.mark.parametrize(
+        ("action", "expected"),
+        [
+            # Normal bash and file ops
+            ("tool:bash:ls -la", ALLOW),
+            ("tool:bash:cat README.md", ALLOW),
+            ("tool:file:create /src/app.py", ALLOW),
+            # gh writes are denied, reads allowed
+            ("tool:bash:gh pr create --title test", DENY),
+            ("tool:bash:gh issue create --body hello", DENY),
+            ("tool:bash:gh release delete v1.0", DENY),
+            ("tool:bash:gh pr close 42", DENY),
+            ("tool:bash:gh pr merge 42", DENY),
+            ("tool:bash:gh pr list", ALLOW),
+            ("tool:bash:gh pr view 42", ALLOW),
+            ("tool:bash:gh issue list", ALLOW),
+            ("tool:bash:gh repo view", ALLOW),
+            ("tool:bash:gh api repos/foo/bar -X POST", DENY),
+            ("tool:bash:gh api repos/foo/bar --method DELETE", DENY),
+            ("tool:bash:gh api repos/foo/bar", ALLOW),
+            # doctl writes are denied, reads allowed
+            ("tool:bash:doctl compute droplet create myvm", DENY),
+            ("tool:bash:doctl apps create --spec app.yaml", DENY),
+            ("tool:bash:doctl compute droplet delete 123", DENY),
+            ("tool:bash:doctl compute droplet list", ALLOW),
+            ("tool:bash:doctl account get", ALLOW),
+            # git: no publishing, local commits fine
+            ("tool:git:push origin main", DENY),
+            ("tool:git:merge_request", DENY),
+            ("tool:git:commit -m 'init'", ALLOW),
+            ("tool:self_edit:system_prompt", ALLOW),
+        ],
+    )
+    def test_matrix(
+        self, guarded_preset: PermissionProfile, action: str, expected: PermissionResult
+    ) -> None:
+        assert check(action, guarded_preset) is expected
 
 
 class TestPresetLocked:
-    def test_allows_file_view(self) -> None:
-        p = get_preset("locked")
-        assert check("tool:file:view /src/app.py", p) is PermissionResult.ALLOW
-
-    def test_denies_file_create(self) -> None:
-        p = get_preset("locked")
-        assert check("tool:file:create /src/app.py", p) is PermissionResult.DENY
-
-    def test_denies_bash(self) -> None:
-        p = get_preset("locked")
-        assert check("tool:bash:ls", p) is PermissionResult.DENY
-
-    def test_denies_git_push(self) -> None:
-        p = get_preset("locked")
-        assert check("tool:git:push origin main", p) is PermissionResult.DENY
+    @pytest.mark.parametrize(
+        ("action", "expected"),
+        [
+            ("tool:file:view /src/app.py", ALLOW),
+            ("tool:file:create /src/app.py", DENY),
+            ("tool:bash:ls", DENY),
+            ("tool:git:push origin main", DENY),
+        ],
+    )
+    def test_matrix(
+        self, locked_preset: PermissionProfile, action: str, expected: PermissionResult
+    ) -> None:
+        assert check(action, locked_preset) is expected
 
 
 class TestGetPreset:
@@ -255,6 +217,30 @@ class TestGetPreset:
             assert isinstance(p, PermissionProfile)
             assert p is PRESETS[name]
 
+    @pytest.mark.parametrize("name", sorted(PRESETS))
+    def test_patterns_compiled_at_import(self, name: str) -> None:
+        p = get_preset(name)
+        assert tuple(c.pattern for c in p._compiled_deny) == p.deny
+        assert tuple(c.pattern for c in p._compiled_allow) == p.allow
+        assert tuple(c.pattern for c in p._compiled_ask) == p.ask
+
+    def test_presets_mapping_is_read_only(self) -> None:
+        with pytest.raises(TypeError):
+            PRESETS["open"] = PermissionProfile(allow=[], ask=[])  # type: ignore[index]
+
+    def test_presets_are_frozen(self) -> None:
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            PRESETS["open"].allow = []  # type: ignore[misc]
+
+    def test_pattern_lists_cannot_be_edited_in_place(self) -> None:
+        source = [r"tool:file:.*"]
+        profile = PermissionProfile(allow=source, ask=[])
+        source.append(r"tool:bash:.*")
+        assert profile.allow == (r"tool:file:.*",)
+        assert check("tool:bash:ls", profile) is PermissionResult.DENY
+        assert isinstance(profile.allow, tuple)
+        assert hash(profile) == hash(PermissionProfile(allow=[r"tool:file:.*"], ask=[]))
+
     def test_raises_on_unknown_name(self) -> None:
         with pytest.raises(UnknownPresetError):
             get_preset("nonexistent")
@@ -265,26 +251,46 @@ class TestGetPreset:
 # ---------------------------------------------------------------------------
 
 
-class TestPatternSpecificity:
-    def test_specific_allow_overrides_broad_ask(self) -> None:
-        profile = PermissionProfile(
+@pytest.fixture(scope="module")
+def profiles() -> dict[str, PermissionProfile]:
+    """Small hand-written profiles shared by the matching matrix below."""
+    return {
+        "specific_allow": PermissionProfile(
             allow=[r"tool:bash:echo.*"],
             ask=[r"tool:bash:.*"],
-        )
-        assert check("tool:bash:echo hello", profile) is PermissionResult.ALLOW
-        assert check("tool:bash:rm -rf /", profile) is PermissionResult.ASK
+        ),
+        "escaped_brackets": PermissionProfile(allow=[r"tool:bash:echo \[test\]"], ask=[]),
+        "bash_any": PermissionProfile(allow=[r"tool:bash:.*"], ask=[]),
+        "colons_in_detail": PermissionProfile(allow=[r"tool:bash:echo a:b:c"], ask=[]),
+        "empty_detail": PermissionProfile(allow=[r"tool:bash:"], ask=[]),
+    }
 
-    def test_regex_special_chars_in_action_handled(self) -> None:
-        profile = PermissionProfile(
-            allow=[r"tool:bash:echo \[test\]"],
-            ask=[],
-        )
-        assert check("tool:bash:echo [test]", profile) is PermissionResult.ALLOW
-        assert check("tool:bash:echo test", profile) is PermissionResult.DENY
 
-    def test_multiline_action_string_not_matched_across_lines(self) -> None:
-        profile = PermissionProfile(allow=[r"tool:bash:.*"], ask=[])
-        assert check("tool:bash:echo hello\nrm -rf /", profile) is PermissionResult.DENY
+class TestPatternSpecificity:
+    @pytest.mark.parametrize(
+        ("profile_key", "action", "expected"),
+        [
+            # A specific allow overrides a broad ask
+            ("specific_allow", "tool:bash:echo hello", ALLOW),
+            ("specific_allow", "tool:bash:rm -rf /", ASK),
+            # Regex special chars in the action are matched literally by escaped patterns
+            ("escaped_brackets", "tool:bash:echo [test]", ALLOW),
+            ("escaped_brackets", "tool:bash:echo test", DENY),
+            # ``.*`` does not match across lines
+            ("bash_any", "tool:bash:echo hello\nrm -rf /", DENY),
+            # Edge cases in the detail part of the action string
+            ("colons_in_detail", "tool:bash:echo a:b:c", ALLOW),
+            ("empty_detail", "tool:bash:", ALLOW),
+        ],
+    )
+    def test_matrix(
+        self,
+        profiles: dict[str, PermissionProfile],
+        profile_key: str,
+        action: str,
+        expected: PermissionResult,
+    ) -> None:
+        assert check(action, profiles[profile_key]) is expected
 
 
 # ---------------------------------------------------------------------------
@@ -293,19 +299,25 @@ class TestPatternSpecificity:
 
 
 class TestEdgeCases:
-    def test_action_string_with_colons_in_detail(self) -> None:
-        profile = PermissionProfile(allow=[r"tool:bash:echo a:b:c"], ask=[])
-        assert check("tool:bash:echo a:b:c", profile) is PermissionResult.ALLOW
-
-    def test_empty_detail_string(self) -> None:
-        profile = PermissionProfile(allow=[r"tool:bash:"], ask=[])
-        assert check("tool:bash:", profile) is PermissionResult.ALLOW
-
-    def test_format_action_produces_correct_string(self) -> None:
-        assert format_action("bash", "pip install requests") == "tool:bash:pip install requests"
-        assert format_action("file", "create /src/app.py") == "tool:file:create /src/app.py"
-        assert format_action("bash", "") == "tool:bash:"
-        assert format_action("git", "push origin main") == "tool:git:push origin main"
+    @pytest.mark.parametrize(
+        ("tool", "detail", "expected"),
+        [
+            ("bash", "pip install requests", "tool:bash:pip install requests"),
+            ("file", "create /src/app.py", "tool:file:create /src/app.py"),
+            ("bash", "", "tool:bash:"),
+            ("git", "push origin main", "tool:git:push origin main"),
+            # Detail is passed through verbatim, separators and all
+            ("bash", "echo a:b:c", "tool:bash:echo a:b:c"),
+            ("bash", "echo hi\nrm -rf /", "tool:bash:echo hi\nrm -rf /"),
+        ],
+    )
+    def test_format_action_produces_correct_string(
+        self, tool: str, detail: str, expected: str
+    ) -> None:
+        assert format_action(tool, detail) == expected
+
+    def test_format_action_default_detail(self) -> None:
+        assert format_action("git") == "tool:git:"
 
     def test_invalid_regex_raises_at_construction(self) -> None:
         with pytest.raises(InvalidPermissionPatternError):
@@ -313,13 +325,115 @@ class TestEdgeCases:
         with pytest.raises(InvalidPermissionPatternError):
             PermissionProfile(allow=[], ask=["(unclosed"])
 
-    def test_profile_compiles_patterns_once(self) -> None:
-        profile = PermissionProfile(allow=[r"tool:file:.*"], ask=[r"tool:bash:.*"])
-        compiled_allow = profile._compiled_allow
-        compiled_ask = profile._compiled_ask
-        # Accessing again should return the same objects
-        assert profile._compiled_allow is compiled_allow
-        assert profile._compiled_ask is compiled_ask
+    def test_profile_compiles_patterns_once(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        profile = PermissionProfile(
+            allow=[r"tool:file:.*"], ask=[r"tool:bash:.*"], deny=[r"tool:bash:rm.*"]
+        )
+
+        def _no_compile(*args: object, **kwargs: object) -> None:
+            raise AssertionError("check() must not compile patterns")
+
+        # Everything is compiled at construction; matching only reuses it
+        monkeypatch.setattr("re.compile", _no_compile)
+        assert check("tool:file:view a.py", profile) is PermissionResult.ALLOW
+        assert check("tool:bash:ls", profile) is PermissionResult.ASK
+        assert check("tool:bash:rm -rf /", profile) is PermissionResult.DENY
+        assert check("tool:git:push", profile) is PermissionResult.DENY
+
+    def test_patterns_joined_into_single_alternation(self) -> None:
+        profile = PermissionProfile(
+            allow=[r"tool:file:.*", r"tool:git:(status|log)"], ask=[r"tool:bash:.*"]
+        )
+        assert profile._union_allow is not None
+        assert profile._union_ask is not None
+        assert profile._union_deny is None  # empty list
+        assert check("tool:git:log", profile) is PermissionResult.ALLOW
+        # fullmatch applies to each alternative, not just a prefix of the union
+        assert check("tool:git:logs", profile) is PermissionResult.DENY
+
+    def test_trailing_wildcard_made_possessive(self) -> None:
+        profile = PermissionProfile(allow=[r"tool:file:.*", r"tool:git:\.+"], ask=[r"x.*?"])
+        assert profile._union_allow is not None
+        assert profile._union_allow.pattern == r"(?:tool:file:.*+)|(?:tool:git:\.++)"
+        assert profile._union_ask is not None
+        assert profile._union_ask.pattern == r"(?:x.*?)"  # lazy tails left alone
+        assert check("tool:file:a\nb", profile) is PermissionResult.DENY
+        assert check("tool:git:..", profile) is PermissionResult.ALLOW
+        # The per-pattern list keeps the source patterns
+        assert tuple(c.pattern for c in profile._compiled_allow) == profile.allow
+
+    def test_backreference_falls_back_to_per_pattern_matching(self) -> None:
+        profile = PermissionProfile(allow=[r"tool:(\w+):x", r"tool:(a)\1"], ask=[])
+        assert profile._union_allow is None
+        assert check("tool:aa", profile) is PermissionResult.ALLOW
+        assert check("tool:ab", profile) is PermissionResult.DENY
+
+    def test_conditional_group_falls_back_to_per_pattern_matching(self) -> None:
+        profile = PermissionProfile(allow=[r"tool:(\w+):x", r"tool:(a)?(?(1)b|c)"], ask=[])
+        assert profile._union_allow is None
+        # Joined, ``(?(1)`` would test the first pattern's group instead
+        assert check("tool:ab", profile) is PermissionResult.ALLOW
+        assert check("tool:ac", profile) is PermissionResult.DENY
+
+    def test_inline_flag_applies_to_its_own_pattern_only(self) -> None:
+        profile = PermissionProfile(allow=[r"tool:file:x", r"(?i)tool:BASH:ls"], ask=[])
+        assert check("tool:bash:ls", profile) is PermissionResult.ALLOW
+        assert check("tool:file:x", profile) is PermissionResult.ALLOW
+        assert check("TOOL:FILE:X", profile) is PermissionResult.DENY
+
+    @pytest.mark.skipif(not _HAS_RE2, reason="optional re2 extra not installed")
+    def test_re2_keeps_guarded_deny_linear(self, guarded_preset: PermissionProfile) -> None:
+        assert guarded_preset._linear is not None
+        linear_deny = guarded_preset._linear[0]
+        assert linear_deny is not None
+        assert not isinstance(linear_deny, re.Pattern)
+
+        seen: list[str] = []
+
+        class _Spy:
+            def fullmatch(self, string: str) -> object:
+                seen.append(string)
+                return linear_deny.fullmatch(string)
+
+        # Private copy so the session-scoped preset stays untouched
+        profile = PermissionProfile(
+            allow=guarded_preset.allow, ask=guarded_preset.ask, deny=guarded_preset.deny
+        )
+        assert profile._linear is not None
+        object.__setattr__(profile, "_linear", (_Spy(), *profile._linear[1:]))
+
+        # Quadratic for backtracking ``re``; must go through the RE2 matcher
+        action = "tool:bash:" + "doctl " * 5000
+        assert check(action, profile) is PermissionResult.ALLOW
+        long_push = "tool:bash:doctl compute droplet delete " + "x" * 1000
+        assert check(long_push, profile) is PermissionResult.DENY
+        assert seen == [action, long_push]
+
+        # Short actions stay on the ``re`` union
+        assert check("tool:bash:ls", profile) is PermissionResult.ALLOW
+        assert seen == [action, long_push]
+
+    def test_lookahead_falls_back_to_re(self) -> None:
+        profile = PermissionProfile(allow=[r"tool:git:(?!push).*"], ask=[])
+        assert isinstance(profile._union_allow, re.Pattern)
+        # RE2 has no lookaheads, so there is nothing for long actions either
+        assert profile._linear is None
+        assert check("tool:git:status", profile) is PermissionResult.ALLOW
+        assert check("tool:git:push", profile) is PermissionResult.DENY
+        assert check("tool:git:push " + "x" * 1000, profile) is PermissionResult.DENY
+
+    def test_long_actions_keep_re_class_semantics(self) -> None:
+        profile = PermissionProfile(allow=[r"tool:bash:\w+\s\d"], ask=[])
+        # Unicode word and digit characters, and a vertical tab as whitespace
+        assert check("tool:bash:" + "é" * 600 + " ٣", profile) is PermissionResult.ALLOW
+        assert check("tool:bash:" + "a" * 600 + "\v1", profile) is PermissionResult.ALLOW
+        assert check("tool:bash:" + "a" * 600 + "\x1c1", profile) is PermissionResult.ALLOW
+
+    def test_divergent_syntax_keeps_re(self) -> None:
+        profile = PermissionProfile(allow=[r"tool:bash:a+$\n", r"tool:info:b{,2}"], ask=[])
+        assert profile._linear is None
+        # ``$`` also matches before a trailing newline under ``re``
+        assert check("tool:bash:" + "a" * 600 + "\n", profile) is PermissionResult.ALLOW
 
     def test_profile_serialization_to_dict(self) -> None:
         profile = PermissionProfile(allow=[r"tool:file:.*"], ask=[r"tool:bash:.*"])
@@ -341,9 +455,9 @@ class TestEdgeCases:
     def test_profile_deserialization_from_dict(self) -> None:
         d = {"allow": [r"tool:file:.*"], "ask": [r"tool:bash:.*"]}
         profile = PermissionProfile.from_dict(d)
-        assert profile.allow == [r"tool:file:.*"]
-        assert profile.ask == [r"tool:bash:.*"]
-        assert profile.deny == []
+        assert profile.allow == (r"tool:file:.*",)
+        assert profile.ask == (r"tool:bash:.*",)
+        assert profile.deny == ()
         # Should also have compiled patterns
         assert len(profile._compiled_allow) == 1
         assert len(profile._compiled_ask) == 1
@@ -351,5 +465,5 @@ class TestEdgeCases:
     def test_profile_deserialization_with_deny(self) -> None:
         d = {"allow": [".*"], "ask": [], "deny": [r"tool:bash:rm.*"]}
         profile = PermissionProfile.from_dict(d)
-        assert profile.deny == [r"tool:bash:rm.*"]
+        assert profile.deny == (r"tool:bash:rm.*",)
         assert len(profile._compiled_deny) == 1
@@ -125,6 +125,12 @@ class TestParseCallbacks:
         cbs = _parse_callbacks(raw, default_output_delay=2.0)
         assert len(cbs) == 1
 
+    def test_bare_code_fences(self) -> None:
+        raw = '```\n[{"trigger": {"type": "on_exit"}, "action": "stop_process"}]\n```\n'
+        cbs = _parse_callbacks(raw, default_output_delay=2.0)
+        assert len(cbs) == 1
+        assert cbs[0].action == CallbackAction.STOP_PROCESS
+
     def test_single_object(self) -> None:
         """Single object (not array) is accepted."""
         raw = json.dumps(
@@ -147,6 +153,16 @@ class TestParseCallbacks:
         cbs = _parse_callbacks(raw, default_output_delay=2.0)
         assert len(cbs) == 1
 
+    def test_unknown_enum_values_skipped(self) -> None:
+        raw = json.dumps([
+            {"trigger": {"type": "on_exit", "exit_filter": "sometimes"}},
+            {"trigger": {"type": "on_exit"}, "action": "explode"},
+            {"trigger": {"type": ["on_exit"]}},
+            {"trigger": {"type": "on_timeout", "timeout_seconds": 5}, "action": "stop_process"},
+        ])
+        cbs = _parse_callbacks(raw, default_output_delay=2.0)
+        assert [cb.trigger.type for cb in cbs] == [TriggerType.ON_TIMEOUT]
+
 
 # ---------------------------------------------------------------------------
 # build_callbacks_from_instructions tests
@@ -3,13 +3,15 @@
 from __future__ import annotations
 
 import asyncio
+import inspect
 import time
 from collections import deque
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from chorus.process.hooks import HookDispatcher
+from chorus.process.hooks import BranchSpawner, HookDispatcher
+from chorus.process.manager import ProcessManager
 from chorus.process.models import (
     CallbackAction,
     ExitFilter,
@@ -42,20 +44,68 @@ def _make_tracked(
     return TrackedProcess(**defaults)  # type: ignore[arg-type]
 
 
+class _FakePM:
+    """The slice of ProcessManager HookDispatcher uses, as plain mocks.
+
+    Unlike a bare ``MagicMock`` it does not mint a child mock for every
+    attribute touched, so a typo in the dispatcher fails loudly.
+    """
+
+    def __init__(self) -> None:
+        self.get_process = MagicMock()
+        self.kill_process = AsyncMock()
+        self.set_callbacks = MagicMock()
+
+
 @pytest.fixture
-def mock_pm() -> MagicMock:
-    pm = MagicMock()
-    pm.kill_process = AsyncMock()
-    return pm
+def mock_pm() -> _FakePM:
+    return _FakePM()
+
+
+class _FakeSpawner:
+    """A BranchSpawner whose only method records its awaits."""
+
+    def __init__(self) -> None:
+        self.spawn_hook_branch = AsyncMock()
 
 
 @pytest.fixture
-def mock_spawner() -> AsyncMock:
-    return AsyncMock()
+def mock_spawner() -> _FakeSpawner:
+    return _FakeSpawner()
+
+
+class _VirtualClock:
+    """Shifts the running loop's clock so timers fire without real waiting."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._real_time = loop.time
+        self._offset = 0.0
+
+    def time(self) -> float:
+        return self._real_time() + self._offset
+
+    async def advance(self, seconds: float) -> None:
+        """Move time forward, then let due timers and the tasks they start run.
+
+        Pending tasks get a turn first so sleeps they are about to start are
+        scheduled against the old time.
+        """
+        await asyncio.sleep(0)
+        self._offset += seconds
+        for _ in range(10):
+            await asyncio.sleep(0)
 
 
 @pytest.fixture
-def dispatcher(mock_pm: MagicMock, mock_spawner: AsyncMock) -> HookDispatcher:
+async def clock(monkeypatch: pytest.MonkeyPatch) -> _VirtualClock:
+    loop = asyncio.get_running_loop()
+    virtual = _VirtualClock(loop)
+    monkeypatch.setattr(loop, "time", virtual.time)
+    return virtual
+
+
+@pytest.fixture
+def dispatcher(mock_pm: _FakePM, mock_spawner: _FakeSpawner) -> HookDispatcher:
     return HookDispatcher(
         process_manager=mock_pm,
         branch_spawner=mock_spawner,
@@ -64,6 +114,26 @@ def dispatcher(mock_pm: MagicMock, mock_spawner: AsyncMock) -> HookDispatcher:
     )
 
 
+# ---------------------------------------------------------------------------
+# Test doubles
+# ---------------------------------------------------------------------------
+
+
+class TestFakesMatchInterfaces:
+    """The stubs stand in for spec'd mocks, so check them against the real API once."""
+
+    @pytest.mark.parametrize(
+        ("fake", "real"),
+        [(_FakePM, ProcessManager), (_FakeSpawner, BranchSpawner)],
+    )
+    def test_fake_methods_exist_with_matching_sync_async(
+        self, fake: type, real: type
+    ) -> None:
+        for name, attr in vars(fake()).items():
+            method = getattr(real, name)
+            assert isinstance(attr, AsyncMock) == inspect.iscoroutinefunction(method), name
+
+
 # ---------------------------------------------------------------------------
 # ON_EXIT triggers
 # ---------------------------------------------------------------------------
@@ -72,7 +142,7 @@ def dispatcher(mock_pm: MagicMock, mock_spawner: AsyncMock) -> HookDispatcher:
 class TestOnExitTrigger:
     @pytest.mark.asyncio
     async def test_on_exit_any_fires(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """ON_EXIT with ANY filter fires on any exit code."""
         cb = ProcessCallback(
@@ -88,7 +158,7 @@ class TestOnExitTrigger:
 
     @pytest.mark.asyncio
     async def test_on_exit_success_filter(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """ON_EXIT with SUCCESS filter only fires on exit code 0."""
         cb = ProcessCallback(
@@ -108,7 +178,7 @@ class TestOnExitTrigger:
 
     @pytest.mark.asyncio
     async def test_on_exit_failure_filter(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """ON_EXIT with FAILURE filter only fires on non-zero exit."""
         cb = ProcessCallback(
@@ -128,7 +198,7 @@ class TestOnExitTrigger:
 
     @pytest.mark.asyncio
     async def test_on_exit_respects_max_fires(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """Exhausted callbacks don't fire again."""
         cb = ProcessCallback(
@@ -153,7 +223,7 @@ class TestOnExitTrigger:
 class TestOnOutputMatchTrigger:
     @pytest.mark.asyncio
     async def test_output_match_fires(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """ON_OUTPUT_MATCH fires when line matches pattern."""
         cb = ProcessCallback(
@@ -171,7 +241,7 @@ class TestOnOutputMatchTrigger:
 
     @pytest.mark.asyncio
     async def test_output_match_no_match(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """No firing when pattern doesn't match."""
         cb = ProcessCallback(
@@ -186,7 +256,7 @@ class TestOnOutputMatchTrigger:
 
     @pytest.mark.asyncio
     async def test_output_match_with_delay(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM, clock: _VirtualClock
     ) -> None:
         """Output delay accumulates output before firing."""
         cb = ProcessCallback(
@@ -208,9 +278,120 @@ class TestOnOutputMatchTrigger:
         assert cb.fire_count == 0
 
         # Wait for delay
-        await asyncio.sleep(0.2)
+        await clock.advance(0.2)
         assert cb.fire_count == 1
 
+    @pytest.mark.asyncio
+    async def test_output_match_burst_coalesced(
+        self, mock_pm: _FakePM, clock: _VirtualClock
+    ) -> None:
+        """Matches during a pending delay share one fire."""
+        cb = ProcessCallback(
+            trigger=HookTrigger(type=TriggerType.ON_OUTPUT_MATCH, pattern=r"ERROR"),
+            action=CallbackAction.STOP_PROCESS,
+            output_delay_seconds=0.1,
+            max_fires=0,
+        )
+        tracked = _make_tracked(callbacks=[cb])
+        mock_pm.get_process.return_value = tracked
+
+        dispatcher = HookDispatcher(
+            process_manager=mock_pm,
+            default_output_delay=0.1,
+        )
+
+        for i in range(5):
+            await dispatcher._on_line(100, "stdout", f"ERROR: {i}")
+        await clock.advance(0.2)
+        assert cb.fire_count == 1
+        assert dispatcher._pending_delays == {}
+
+        # A later match starts a new delay window
+        await dispatcher._on_line(100, "stdout", "ERROR: again")
+        await clock.advance(0.2)
+        assert cb.fire_count == 2
+
+    @pytest.mark.asyncio
+    async def test_match_between_fire_and_cleanup_keeps_new_delay(
+        self, mock_pm: _FakePM, clock: _VirtualClock
+    ) -> None:
+        """A match after a fire but before its cleanup keeps its own pending fire."""
+        cb = ProcessCallback(
+            trigger=HookTrigger(type=TriggerType.ON_OUTPUT_MATCH, pattern=r"ERROR"),
+            action=CallbackAction.STOP_PROCESS,
+            output_delay_seconds=0.1,
+            max_fires=0,
+        )
+        tracked = _make_tracked(callbacks=[cb])
+        mock_pm.get_process.return_value = tracked
+
+        dispatcher = HookDispatcher(
+            process_manager=mock_pm,
+            default_output_delay=0.1,
+        )
+        loop = asyncio.get_running_loop()
+
+        def _match_again() -> None:
+            # Eager start runs _on_line right here: the first delayed task has
+            # finished, but its done callback is still queued behind us.
+            asyncio.Task(
+                dispatcher._on_line(100, "stdout", "ERROR: 2"), loop=loop, eager_start=True
+            )
+
+        def _first_kill(pid: int) -> None:
+            mock_pm.kill_process.side_effect = None
+            loop.call_soon(_match_again)
+
+        mock_pm.kill_process.side_effect = _first_kill
+
+        await dispatcher._on_line(100, "stdout", "ERROR: 1")
+        await clock.advance(0.1)
+        assert cb.fire_count == 1
+        assert len(dispatcher._pending_delays) == 1
+
+        # Coalesced into the pending fire, not a fresh one
+        await dispatcher._on_line(100, "stdout", "ERROR: 3")
+        await clock.advance(0.1)
+        assert cb.fire_count == 2
+        assert dispatcher._pending_delays == {}
+
+    @pytest.mark.asyncio
+    async def test_match_during_slow_dispatch_fires_again(
+        self, mock_pm: _FakePM, clock: _VirtualClock
+    ) -> None:
+        """A match while the previous fire is still dispatching is not dropped."""
+        cb = ProcessCallback(
+            trigger=HookTrigger(type=TriggerType.ON_OUTPUT_MATCH, pattern=r"ERROR"),
+            action=CallbackAction.STOP_PROCESS,
+            output_delay_seconds=0.1,
+            max_fires=0,
+        )
+        tracked = _make_tracked(callbacks=[cb])
+        mock_pm.get_process.return_value = tracked
+
+        dispatcher = HookDispatcher(
+            process_manager=mock_pm,
+            default_output_delay=0.1,
+        )
+        release = asyncio.Event()
+
+        async def _blocking_kill(pid: int) -> None:
+            await release.wait()
+
+        mock_pm.kill_process.side_effect = _blocking_kill
+
+        await dispatcher._on_line(100, "stdout", "ERROR: 1")
+        await clock.advance(0.1)
+        # First fire is stuck in kill_process
+        assert cb.fire_count == 1
+        assert dispatcher._pending_delays == {}
+
+        await dispatcher._on_line(100, "stdout", "ERROR: 2")
+        release.set()
+        await clock.advance(0.1)
+        assert cb.fire_count == 2
+        assert mock_pm.kill_process.await_count == 2
+
 
 # ---------------------------------------------------------------------------
 # Action dispatch
@@ -220,7 +401,7 @@ class TestOnOutputMatchTrigger:
 class TestActionDispatch:
     @pytest.mark.asyncio
     async def test_stop_process_action(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """STOP_PROCESS calls kill_process."""
         cb = ProcessCallback(
@@ -235,7 +416,7 @@ class TestActionDispatch:
 
     @pytest.mark.asyncio
     async def test_stop_branch_action(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """STOP_BRANCH calls the thread kill callback."""
         kill_cb = AsyncMock()
@@ -256,7 +437,7 @@ class TestActionDispatch:
 
     @pytest.mark.asyncio
     async def test_inject_context_action(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """INJECT_CONTEXT calls the inject callback."""
         inject_cb = AsyncMock()
@@ -282,7 +463,7 @@ class TestActionDispatch:
 
     @pytest.mark.asyncio
     async def test_spawn_branch_action(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock, mock_spawner: AsyncMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM, mock_spawner: _FakeSpawner
     ) -> None:
         """SPAWN_BRANCH calls the branch spawner."""
         cb = ProcessCallback(
@@ -308,7 +489,7 @@ class TestActionDispatch:
 class TestSafety:
     @pytest.mark.asyncio
     async def test_max_recursion_depth(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock, mock_spawner: AsyncMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM, mock_spawner: _FakeSpawner
     ) -> None:
         """SPAWN_BRANCH blocked when recursion depth exceeded."""
         cb = ProcessCallback(
@@ -323,7 +504,7 @@ class TestSafety:
 
     @pytest.mark.asyncio
     async def test_max_fires_respected(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """Callback only fires up to max_fires times."""
         cb = ProcessCallback(
@@ -343,7 +524,7 @@ class TestSafety:
 
     @pytest.mark.asyncio
     async def test_max_fires_zero_unlimited(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """max_fires=0 means unlimited — callback never becomes exhausted."""
         cb = ProcessCallback(
@@ -363,7 +544,7 @@ class TestSafety:
 
     @pytest.mark.asyncio
     async def test_no_spawner_configured(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """SPAWN_BRANCH action is a no-op when no spawner is configured."""
         dispatcher = HookDispatcher(
@@ -384,7 +565,7 @@ class TestSafety:
 
     @pytest.mark.asyncio
     async def test_wire_to_manager(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM
     ) -> None:
         """wire_to_manager connects callbacks to the process manager."""
         dispatcher.wire_to_manager()
@@ -408,7 +589,7 @@ class TestSafety:
 class TestNotifyChannelAction:
     @pytest.mark.asyncio
     async def test_notify_callback_called(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """NOTIFY_CHANNEL calls the notify callback with correct args."""
         notify_cb = AsyncMock()
@@ -434,7 +615,7 @@ class TestNotifyChannelAction:
 
     @pytest.mark.asyncio
     async def test_notify_no_callback_is_noop(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """NOTIFY_CHANNEL is a no-op when no notify callback is configured."""
         dispatcher = HookDispatcher(
@@ -461,7 +642,7 @@ class TestNotifyChannelAction:
 
 class TestOnSpawn:
     def test_on_spawn_starts_timeout_watchers(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """_on_spawn calls start_timeout_watchers."""
         dispatcher = HookDispatcher(
@@ -475,7 +656,7 @@ class TestOnSpawn:
 
     @pytest.mark.asyncio
     async def test_on_spawn_starts_timeout_task(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM, clock: _VirtualClock
     ) -> None:
         """_on_spawn starts timeout watchers for timeout callbacks."""
         cb = ProcessCallback(
@@ -492,7 +673,7 @@ class TestOnSpawn:
         dispatcher._on_spawn(100)
 
         # Wait for the timeout to fire
-        await asyncio.sleep(0.2)
+        await clock.advance(0.2)
         assert cb.fire_count == 1
         mock_pm.kill_process.assert_awaited()
 
@@ -500,7 +681,7 @@ class TestOnSpawn:
 class TestStartNewTimeoutWatchers:
     @pytest.mark.asyncio
     async def test_start_new_timeout_watchers_only_new(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM, clock: _VirtualClock
     ) -> None:
         """start_new_timeout_watchers only starts watchers for the given callbacks."""
         # Existing callback (already has a watcher)
@@ -525,13 +706,13 @@ class TestStartNewTimeoutWatchers:
         dispatcher.start_new_timeout_watchers(100, [new_cb])
 
         # Wait for the short timeout to fire
-        await asyncio.sleep(0.2)
+        await clock.advance(0.2)
         assert new_cb.fire_count == 1
         # Existing callback should NOT have fired (10s timeout, not started)
         assert existing_cb.fire_count == 0
 
     def test_start_new_timeout_watchers_ignores_non_timeout(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """start_new_timeout_watchers ignores non-timeout callbacks."""
         cb = ProcessCallback(
@@ -547,14 +728,14 @@ class TestStartNewTimeoutWatchers:
         )
         # Should not raise or create tasks
         dispatcher.start_new_timeout_watchers(100, [cb])
-        # No timeout tasks should have been created
-        assert 100 not in dispatcher._timeout_tasks
+        # No timeout timers should have been armed
+        assert 100 not in dispatcher._timeout_handles
 
 
 class TestOnTimeoutTrigger:
     @pytest.mark.asyncio
     async def test_timeout_fires(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM, clock: _VirtualClock
     ) -> None:
         """ON_TIMEOUT fires after the specified duration."""
         cb = ProcessCallback(
@@ -565,14 +746,14 @@ class TestOnTimeoutTrigger:
         mock_pm.get_process.return_value = tracked
 
         dispatcher.start_timeout_watchers(100)
-        await asyncio.sleep(0.2)
+        await clock.advance(0.2)
 
         assert cb.fire_count == 1
         mock_pm.kill_process.assert_awaited()
 
     @pytest.mark.asyncio
     async def test_timeout_cancelled_on_exit(
-        self, dispatcher: HookDispatcher, mock_pm: MagicMock
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM, clock: _VirtualClock
     ) -> None:
         """ON_TIMEOUT watcher is cancelled when the process exits."""
         cb_timeout = ProcessCallback(
@@ -587,7 +768,7 @@ class TestOnTimeoutTrigger:
         mock_pm.get_process.return_value = tracked
 
         dispatcher.start_timeout_watchers(100)
-        await asyncio.sleep(0.05)
+        await clock.advance(0.05)
 
         # Process exits before timeout
         await dispatcher._on_exit(100, 0)
@@ -596,6 +777,31 @@ class TestOnTimeoutTrigger:
         assert cb_timeout.fire_count == 0
         # Exit callback SHOULD have fired
         assert cb_exit.fire_count == 1
+        assert 100 not in dispatcher._timeout_handles
+
+    @pytest.mark.asyncio
+    async def test_all_timeouts_cancelled_on_exit(
+        self, dispatcher: HookDispatcher, mock_pm: _FakePM, clock: _VirtualClock
+    ) -> None:
+        """Every armed timeout is cancelled on exit, not just the last one."""
+        cbs = [
+            ProcessCallback(
+                trigger=HookTrigger(type=TriggerType.ON_TIMEOUT, timeout_seconds=0.1),
+                action=CallbackAction.STOP_PROCESS,
+            )
+            for _ in range(2)
+        ]
+        tracked = _make_tracked(callbacks=cbs)
+        mock_pm.get_process.return_value = tracked
+
+        dispatcher.start_timeout_watchers(100)
+        assert len(dispatcher._timeout_handles[100]) == 2
+        await dispatcher._on_exit(100, 0)
+
+        # The mocked process still reports RUNNING, so only cancellation
+        # keeps these from firing.
+        await clock.advance(0.2)
+        assert [cb.fire_count for cb in cbs] == [0, 0]
 
 
 # ---------------------------------------------------------------------------
@@ -606,7 +812,7 @@ class TestOnTimeoutTrigger:
 class TestNotifyRateLimit:
     @pytest.mark.asyncio
     async def test_notify_rate_limited(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """Rapid NOTIFY_CHANNEL fires are suppressed after the first."""
         notify_cb = AsyncMock()
@@ -635,7 +841,7 @@ class TestNotifyRateLimit:
 
     @pytest.mark.asyncio
     async def test_notify_skipped_count_in_next_message(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """After cooldown, the next notification includes skipped count."""
         notify_cb = AsyncMock()
@@ -678,7 +884,7 @@ class TestNotifyRateLimit:
 
     @pytest.mark.asyncio
     async def test_rate_limit_does_not_affect_other_actions(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """STOP_PROCESS and other actions are not rate-limited."""
         dispatcher = HookDispatcher(
@@ -703,7 +909,7 @@ class TestNotifyRateLimit:
 
     @pytest.mark.asyncio
     async def test_notify_rate_limit_zero_disables(
-        self, mock_pm: MagicMock
+        self, mock_pm: _FakePM
     ) -> None:
         """min_message_interval=0 disables rate limiting."""
         notify_cb = AsyncMock()
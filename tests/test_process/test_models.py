@@ -5,6 +5,8 @@ from __future__ import annotations
 import json
 from collections import deque
 
+import pytest
+
 from chorus.process.models import (
     CallbackAction,
     ExitFilter,
@@ -90,6 +92,33 @@ class TestHookTrigger:
         p2 = t.compiled_pattern
         assert p1 is p2
 
+    @pytest.mark.parametrize(
+        ("pattern", "line", "expected"),
+        [
+            ("ERROR", "2026 ERROR: disk full", True),
+            ("Server started", "Server started on :8000", True),
+            ("ERROR", "all good", False),
+            (r"ERR(OR)?", "ERR: short form", True),
+            (r"a.c", "abc", True),
+            (r"a\.c", "abc", False),
+        ],
+    )
+    def test_matches(self, pattern: str, line: str, expected: bool) -> None:
+        t = HookTrigger(type=TriggerType.ON_OUTPUT_MATCH, pattern=pattern)
+        assert t.matches(line) is expected
+
+    def test_matches_literal_fast_path(self) -> None:
+        t = HookTrigger(type=TriggerType.ON_OUTPUT_MATCH, pattern="Server started")
+        assert t.matches("Server started")
+        assert t._literal == "Server started"
+        t = HookTrigger(type=TriggerType.ON_OUTPUT_MATCH, pattern=r"error|ERROR")
+        assert t.matches("ERROR")
+        assert t._literal is None
+
+    def test_matches_without_pattern(self) -> None:
+        assert not HookTrigger(type=TriggerType.ON_EXIT).matches("anything")
+        assert not HookTrigger(type=TriggerType.ON_OUTPUT_MATCH).matches("anything")
+
     def test_on_timeout_trigger(self) -> None:
         t = HookTrigger(type=TriggerType.ON_TIMEOUT, timeout_seconds=30.0)
         assert t.timeout_seconds == 30.0
@@ -83,6 +83,31 @@ class TestToolRegistry:
         assert tool.parameters == schema
         assert "path" in tool.parameters["properties"]
 
+    def test_llm_required_excludes_context_params(self) -> None:
+        tool = ToolDefinition(
+            name="ctx_tool",
+            description="Tool with injected params",
+            parameters={
+                "type": "object",
+                "properties": {"path": {"type": "string"}, "mode": {"type": "string"}},
+                "required": ["path", "workspace", "mode", "agent_name"],
+            },
+            handler=AsyncMock(),
+        )
+        assert tool.llm_required == ("path", "mode")
+
+    def test_handler_params_follow_signature(self) -> None:
+        async def handler(path: str, content: str, workspace: Path) -> str:
+            return ""
+
+        tool = ToolDefinition(
+            name="sig_tool",
+            description="Tool with a real handler",
+            parameters={},
+            handler=handler,
+        )
+        assert tool.handler_params == ("path", "content", "workspace")
+
 
 class TestRegistryContainsFileTools:
     def test_file_tools_registered(self) -> None: